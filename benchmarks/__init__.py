@@ -0,0 +1 @@
+# ---------- FILE: benchmarks/__init__.py ----------
@@ -0,0 +1,307 @@
+# ---------- FILE: benchmarks/bench_cogs.py ----------
+"""
+Offline load test for the cogs. Seeds a temporary SQLite database at a
+synthetic scale, then drives the real handlers with fake interactions and
+messages (see benchmarks/fakes.py) and a local stand-in for the translation
+providers. Reports ops/sec, p50/p99 latency, SQL statements per op and
+peak RSS per scenario, and writes everything to JSON for later comparison.
+
+Run from the repo root:
+    python -m benchmarks.bench_cogs --scale 10k
+    python -m benchmarks.bench_cogs --scale 100k --history 1000000 --compare old.json
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+# Unthrottled scheduler unless the caller set these: we measure code, not quotas
+SCHEDULER_ENV = {
+    "TRANSLATE_GLOBAL_RATE": "1e9", "TRANSLATE_GLOBAL_BURST": "1000000",
+    "TRANSLATE_GUILD_RATE": "1e9", "TRANSLATE_GUILD_BURST": "1000000",
+    "TRANSLATE_CHANNEL_RATE": "1e9", "TRANSLATE_CHANNEL_BURST": "1000000",
+    "TRANSLATE_QUEUE_MAX": "1000000",
+}
+
+
+# ---------- Measurement ----------
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB elsewhere
+
+
+def query_count() -> int:
+    from metrics import DB_SECONDS
+    return sum(series["count"] for series in DB_SECONDS.snapshot().values())
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)] if values else 0.0
+
+
+async def measure(name: str, make_ops, concurrency: int = 1) -> dict:
+    """
+    Awaits every coroutine from `make_ops()`, `concurrency` at a time, and
+    times each one individually.
+    """
+    ops = list(make_ops())
+    latencies = []
+
+    async def timed(op):
+        start = time.perf_counter()
+        await op
+        latencies.append(time.perf_counter() - start)
+
+    queries = query_count()
+    start = time.perf_counter()
+    for i in range(0, len(ops), concurrency):
+        await asyncio.gather(*(timed(op) for op in ops[i:i + concurrency]))
+    elapsed = time.perf_counter() - start
+    queries = query_count() - queries
+    result = {
+        "ops": len(ops),
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 4),
+        "ops_per_sec": round(len(ops) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(statistics.median(latencies) * 1000, 3) if latencies else 0.0,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "queries": queries,
+        "queries_per_op": round(queries / len(ops), 2) if ops else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    print(f"{name:<24} {result['ops']:>6} ops  {result['ops_per_sec']:>10,.1f} ops/s  "
+          f"p50 {result['p50_ms']:>9.2f} ms  p99 {result['p99_ms']:>9.2f} ms  "
+          f"{result['queries_per_op']:>7.2f} q/op  rss {result['peak_rss_mb']:>7.1f} MB")
+    return result
+
+
+# ---------- Seeding ----------
+def seed(names: int, history: int, rng: random.Random):
+    """
+    Bulk-inserts `names` names and `history` history rows spread over the
+    last year, bypassing the ORM so seeding stays fast at 1M rows.
+    """
+    import datetime
+    from database import engine
+
+    now = datetime.datetime.utcnow()
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO names (id, name, kill_score, vs_score) VALUES (?, ?, ?, ?)",
+            [(i, f"player{i:06d}", rng.randint(1, 10 ** 9), rng.randint(1, 10 ** 7)) for i in range(1, names + 1)]
+        )
+        chunk = 100_000
+        for offset in range(0, history, chunk):
+            rows = []
+            for _ in range(min(chunk, history - offset)):
+                when = now - datetime.timedelta(seconds=rng.randint(0, 365 * 86400))
+                rows.append((rng.randint(1, names), rng.choice(("kill", "vs")), rng.randint(1, 10 ** 9),
+                             when.strftime("%Y-%m-%d %H:%M:%S.%f")))
+            conn.exec_driver_sql("INSERT INTO score_history (name_id, category, value, timestamp) VALUES (?, ?, ?, ?)", rows)
+
+
+def csv_bytes(rows: list) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["Name", "Score"])
+    writer.writerows(rows)
+    return buf.getvalue().encode("utf-8")
+
+
+# ---------- Scenarios ----------
+async def run_scenarios(args, names: int, rng: random.Random) -> dict:
+    from discord import app_commands
+    import channel_cache
+    import leaderboard_index
+    from repository import repo
+    from cogs.translation import TranslationCog
+    from cogs.scoring import ScoringCog
+    from cogs.export_import import ExportImportCog
+    from benchmarks.fakes import (FakeBot, FakeInteraction, FakeMessage, FakeMessageEdit, FakeAttachment,
+                                  StubTranslationClient)
+
+    kill = app_commands.Choice(name="Kill Score", value="kill")
+    yes = app_commands.Choice(name="Yes", value="yes")
+    bot = None  # the cogs only keep a reference
+    results = {}
+
+    # on_message: a channel pair, half repeated phrases (cache hits), half unique text
+    translation = TranslationCog(FakeBot())
+    await translation.client.close()
+    translation.client = StubTranslationClient(latency=args.provider_latency / 1000)
+    config, _ = await repo.add_channel(100, "en", "pt", ["🇺🇸", "🇵🇹"])
+    channel_cache.put(config)
+    phrases = [f"see you at the raid tonight {i}" for i in range(50)]
+
+    def messages():
+        for i in range(args.messages):
+            text = rng.choice(phrases) if i % 2 else f"unique message number {i} about the war plan"
+            yield translation.on_message(FakeMessage(text, channel_id=100, guild_id=1 + i % 5))
+
+    results["on_message"] = await measure("on_message", messages, concurrency=args.concurrency)
+
+    # Edits: long announcements with one sentence changed
+    announcements = []
+    for i in range(args.edits):
+        sentences = [f"Announcement {i} sentence {j} with enough words to look like a real sentence." for j in range(40)]
+        message = FakeMessage(" ".join(sentences), channel_id=100, guild_id=1 + i % 5)
+        await translation.on_message(message)
+        announcements.append((message, sentences))
+
+    def edits():
+        for message, sentences in announcements:
+            sentences[rng.randrange(len(sentences))] = f"Edited sentence {rng.random()}."
+            yield translation.on_raw_message_edit(FakeMessageEdit(message, " ".join(sentences)))
+
+    calls = translation.client.calls
+    results["on_message_edit"] = await measure("on_message_edit", edits, concurrency=args.concurrency)
+    results["on_message_edit"]["provider_calls_per_op"] = round((translation.client.calls - calls) / max(args.edits, 1), 2)
+    await translation.scheduler.close()
+
+    # addscore / showscores
+    scoring = ScoringCog(bot)
+
+    def addscores():
+        for _ in range(args.commands):
+            name = f"player{rng.randint(1, names):06d}"
+            yield scoring.addscore.callback(scoring, FakeInteraction(), kill, name, rng.randint(1, 2 * 10 ** 9))
+
+    results["addscore"] = await measure("addscore", addscores)
+    table = app_commands.Choice(name="Table", value="table")
+    results["showscores_table"] = await measure("showscores_table", lambda: (
+        scoring.showscores.callback(scoring, FakeInteraction(), kill, table) for _ in range(args.commands)
+    ))
+    results["showscores_table_diff"] = await measure("showscores_table_diff", lambda: (
+        scoring.showscores.callback(scoring, FakeInteraction(), kill, table, yes) for _ in range(args.commands)
+    ))
+    if names <= args.chart_max_names:
+        bar = app_commands.Choice(name="Bar Chart", value="bar")
+
+        async def render_chart():
+            repo.score_version += 1  # force a render instead of a cache hit
+            await scoring.showscores.callback(scoring, FakeInteraction(), kill, bar)
+
+        results["showscores_bar"] = await measure("showscores_bar", lambda: (render_chart() for _ in range(args.charts)))
+    scoring.charts.close()
+
+    # import / export
+    exports = ExportImportCog(bot)
+    upload = csv_bytes([(f"player{i:06d}", 2 * 10 ** 9 + i) for i in range(1, names + 1)])
+    results["importcsv"] = await measure("importcsv", lambda: (
+        exports.importcsv.callback(exports, FakeInteraction(), "kill", FakeAttachment(upload)) for _ in range(args.imports)
+    ))
+    leaderboard_index.load()
+    results["exportcsv"] = await measure("exportcsv", lambda: (
+        exports.exportcsv.callback(exports, FakeInteraction(), kill) for _ in range(args.imports)
+    ))
+    history = app_commands.Choice(name="History", value="history")
+    gz = app_commands.Choice(name="CSV (gzip)", value="csv.gz")
+    results["export_history"] = await measure("export_history", lambda: (
+        exports.exportdata.callback(exports, FakeInteraction(), history, kill, gz) for _ in range(1)
+    ))
+    return results
+
+
+# ---------- Reporting ----------
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["scenarios"]
+    print(f"\nvs {baseline_path}")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if not old or not old["ops_per_sec"]:
+            continue
+        change = (result["ops_per_sec"] - old["ops_per_sec"]) / old["ops_per_sec"]
+        print(f"{name:<24} {old['ops_per_sec']:>10,.1f} -> {result['ops_per_sec']:>10,.1f} ops/s ({change:+.1%})  "
+              f"p99 {old['p99_ms']:.2f} -> {result['p99_ms']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="1k", help="number of tracked names")
+    parser.add_argument("--history", type=int, default=None, help="history rows (default: 10 per name)")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50, help="messages in flight at once")
+    parser.add_argument("--edits", type=int, default=200, help="long messages edited after translation")
+    parser.add_argument("--provider-latency", type=float, default=0.0, help="simulated provider latency, ms")
+    parser.add_argument("--commands", type=int, default=200, help="ops per score command scenario")
+    parser.add_argument("--charts", type=int, default=5)
+    parser.add_argument("--chart-max-names", type=int, default=10_000, help="skip chart rendering above this")
+    parser.add_argument("--imports", type=int, default=3, help="ops per import/export scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results JSON path (default: benchmarks/results/cogs-<scale>-<time>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    names = SCALES[args.scale]
+    history = args.history if args.history is not None else names * 10
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Before anything imports database.py
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        for key, value in SCHEDULER_ENV.items():
+            os.environ.setdefault(key, value)
+        import channel_cache
+        import leaderboard_index
+        import metrics
+        import migrations
+        from database import engine
+        from repository import repo
+
+        migrations.upgrade(engine)
+        start = time.perf_counter()
+        seed(names, history, rng)
+        leaderboard_index.load()
+        channel_cache.load()
+        print(f"seeded {names:,} names and {history:,} history rows in {time.perf_counter() - start:.1f}s")
+        metrics.instrument_engine(engine)
+
+        results = asyncio.run(run_scenarios(args, names, rng))
+        repo.close()
+        engine.dispose()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "names": names,
+            "history": history,
+            "args": vars(args),
+        },
+        "scenarios": results,
+    }
+    output = args.output or os.path.join("benchmarks", "results", f"cogs-{args.scale}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
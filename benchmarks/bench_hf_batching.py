@@ -0,0 +1,132 @@
+# ---------- FILE: benchmarks/bench_hf_batching.py ----------
+"""
+Drives HF micro-batching against a local stand-in for the inference API
+(HF_API_URL is what makes that possible). Submits N concurrent texts per
+round through the real TranslationClient and checks that they went out as
+ceil(N / max_batch) requests with list-valued `inputs`, and that every
+caller got its own translation back. Exits non-zero when a check fails.
+
+Run from the repo root:
+    python -m benchmarks.bench_hf_batching
+    python -m benchmarks.bench_hf_batching --texts 500 --max-batch 32 --latency 200
+"""
+import argparse
+import asyncio
+import math
+import statistics
+import sys
+import time
+
+from aiohttp import web
+
+
+# ---------- Stand-in Server ----------
+class StandInServer:
+    """
+    Answers POST /<model> like the inference API: `inputs` may be a string
+    or a list, and the reply has one {"translation_text"} per input, in order.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = []  # the `inputs` of every request received
+        self.runner = None
+        self.url = None
+
+    async def translate(self, request):
+        body = await request.json()
+        inputs = body["inputs"]
+        self.requests.append(inputs)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        model = request.match_info["model"]
+        return web.json_response([{"translation_text": f"<{model}> {text}"} for text in texts])
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/{model:.+}", self.translate)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class NoGoogle:
+    # Any fallback would hide a batching failure, so it fails loudly instead
+    async def translate(self, text, src, tgt):
+        raise AssertionError(f"fell back to Google for {text!r}")
+
+    async def close(self):
+        pass
+
+
+# ---------- Rounds ----------
+async def run(args) -> bool:
+    from config import HF_MODELS
+    from translation_batcher import BatchScheduler
+    from translation_providers import HuggingFaceProvider, TranslationClient
+
+    server = StandInServer(latency=args.latency / 1000)
+    await server.start()
+    client = TranslationClient(hf=HuggingFaceProvider(api_url=server.url), google=NoGoogle())
+    client.batcher = BatchScheduler(client._send_hf_batch, window=args.window / 1000, max_batch=args.max_batch)
+    (src, tgt), model = next(iter(HF_MODELS.items()))
+
+    ok = True
+    latencies = []
+    for round_number in range(args.rounds):
+        before = len(server.requests)
+        texts = [f"round {round_number} text {i}" for i in range(args.texts)]
+
+        async def timed(text):
+            start = time.perf_counter()
+            result = await client.translate(text, src, tgt)
+            latencies.append(time.perf_counter() - start)
+            return result
+
+        results = await asyncio.gather(*(timed(text) for text in texts))
+        sent = server.requests[before:]
+        expected = math.ceil(args.texts / args.max_batch)
+        checks = {
+            f"{expected} requests": len(sent) == expected,
+            "list-valued inputs": all(isinstance(inputs, list) for inputs in sent),
+            "every text sent once": sorted(t for inputs in sent for t in inputs) == sorted(texts),
+            "results in order": results == [f"<{model}> {text}" for text in texts],
+        }
+        failed = [name for name, passed in checks.items() if not passed]
+        ok = ok and not failed
+        print(f"round {round_number}: {args.texts} texts -> {len(sent)} requests "
+              f"(sizes {[len(inputs) for inputs in sent]})  {'ok' if not failed else 'FAILED: ' + ', '.join(failed)}")
+
+    stats = client.batcher.stats()
+    latencies.sort()
+    print(f"\n{stats['batches']} batches, avg size {stats['avg_batch_size']:.1f}, "
+          f"queue wait p50 {stats['queue_wait_p50'] * 1000:.1f} ms, max {stats['queue_wait_max'] * 1000:.1f} ms")
+    print(f"per-text latency p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"max {latencies[-1] * 1000:.1f} ms")
+    await client.close()
+    await server.stop()
+    return ok
+
+
+def main():
+    from config import HF_BATCH_MAX, HF_BATCH_WINDOW
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=100, help="concurrent texts per round")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--max-batch", type=int, default=HF_BATCH_MAX)
+    parser.add_argument("--window", type=float, default=HF_BATCH_WINDOW * 1000, help="batch window, ms")
+    parser.add_argument("--latency", type=float, default=50.0, help="stand-in server latency per request, ms")
+    args = parser.parse_args()
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# ---------- FILE: benchmarks/bench_multiprocess.py ----------
+"""
+Runs several bot-like processes against one temporary SQLite database, the
+way sharded workers share it. Writers add scores through the repository
+while watchers only run the change-log poller; the report shows write
+throughput and how long other processes took to see each change.
+
+Run from the repo root:  python -m benchmarks.bench_multiprocess
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# ---------- Child Processes ----------
+def child_writer(names: int, tag: str):
+    import asyncio
+    from repository import repo
+
+    async def run():
+        written = {}
+        start = time.perf_counter()
+        for i in range(names):
+            name = f"{tag}-{i}"
+            await repo.upsert_score(name, "kill", i + 1)
+            written[name] = time.time()
+        return written, time.perf_counter() - start
+
+    written, elapsed = asyncio.run(run())
+    print(json.dumps({"written": written, "seconds": elapsed}))
+
+
+def child_watcher(expected: int, timeout: float, interval: float):
+    import asyncio
+    import leaderboard_index
+    from change_log import ChangePoller
+
+    async def run():
+        leaderboard_index.load()
+        poller = ChangePoller(interval=interval)
+        seen = {}
+        poller.start()
+        deadline = time.monotonic() + timeout
+        while len(seen) < expected and time.monotonic() < deadline:
+            await asyncio.sleep(interval / 2)
+            now = time.time()
+            for _, name, _ in leaderboard_index.get("kill").top(len(leaderboard_index.get("kill"))):
+                seen.setdefault(name, now)
+        poller.stop()
+        return seen, poller.polls
+
+    seen, polls = asyncio.run(run())
+    print(json.dumps({"seen": seen, "polls": polls}))
+
+
+# ---------- Parent ----------
+def spawn(args: list, env: dict) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", "benchmarks.bench_multiprocess", *args],
+                            env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
+def collect(proc: subprocess.Popen) -> dict:
+    out, err = proc.communicate()
+    if proc.returncode != 0:
+        raise SystemExit(f"child failed:\n{err}")
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--watchers", type=int, default=2)
+    parser.add_argument("--names", type=int, default=200, help="names written by each writer")
+    parser.add_argument("--interval", type=float, default=0.1, help="change-log poll interval, seconds")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--child", choices=["writer", "watcher"], help=argparse.SUPPRESS)
+    parser.add_argument("--tag", default="w", help=argparse.SUPPRESS)
+    parser.add_argument("--expected", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == "writer":
+        return child_writer(args.names, args.tag)
+    if args.child == "watcher":
+        return child_watcher(args.expected, args.timeout, args.interval)
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        subprocess.run([sys.executable, "-c", "import migrations; from database import engine; migrations.upgrade(engine)"],
+                       env=env, check=True)
+        expected = args.writers * args.names
+        watchers = [spawn(["--child", "watcher", "--expected", str(expected), "--interval", str(args.interval),
+                           "--timeout", str(args.timeout)], env) for _ in range(args.watchers)]
+        time.sleep(1.0)  # let watchers load and prime before the first write
+        writers = [spawn(["--child", "writer", "--names", str(args.names), "--tag", f"w{i}"], env)
+                   for i in range(args.writers)]
+        written = [collect(p) for p in writers]
+        seen = [collect(p) for p in watchers]
+
+    write_times = {name: t for result in written for name, t in result["written"].items()}
+    slowest = max(result["seconds"] for result in written)
+    print(f"writers: {args.writers} x {args.names} upserts in {slowest:.2f}s "
+          f"({expected / slowest:,.0f} upserts/s combined)")
+    for i, result in enumerate(seen):
+        lags = [result["seen"][name] - t for name, t in write_times.items() if name in result["seen"]]
+        print(f"watcher {i}: saw {len(lags)}/{expected} changes in {result['polls']} polls, "
+              f"lag p50 {statistics.median(lags) * 1000 if lags else 0:.0f} ms, "
+              f"p99 {percentile(lags, 0.99) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# ---------- FILE: benchmarks/bench_startup.py ----------
+"""
+Measures bot startup without connecting to Discord: importing main, then
+what setup_hook does before the first sync (loading every cog and hashing
+the command tree). Each round runs in a fresh interpreter, so import caching
+inside one process does not hide regressions.
+
+Run from the repo root:  python -m benchmarks.bench_startup
+Exits non-zero when --max-seconds is given and the median exceeds it.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Libraries that should only be imported on first use
+HEAVY_MODULES = ["pandas", "matplotlib", "seaborn", "googletrans", "openpyxl", "pyarrow"]
+
+CHILD = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def setup():
+    await main.load_cogs(main.bot)
+    main.metrics.instrument_tree(main.bot.tree)
+    main.command_tree_hash(main.bot.tree)
+
+asyncio.run(setup())
+ready = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "setup": ready - imported,
+    "heavy": [m for m in HEAVY if m in sys.modules],
+}))
+"""
+
+
+def run_once() -> dict:
+    code = f"HEAVY = {HEAVY_MODULES!r}\n" + CHILD
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None, help="fail when median import+setup is slower")
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.rounds)]
+    imports = [r["import"] for r in results]
+    setups = [r["setup"] for r in results]
+    totals = [i + s for i, s in zip(imports, setups)]
+    print(f"{'import main':<16} median {statistics.median(imports) * 1000:>8.1f} ms   min {min(imports) * 1000:>8.1f} ms")
+    print(f"{'setup_hook':<16} median {statistics.median(setups) * 1000:>8.1f} ms   min {min(setups) * 1000:>8.1f} ms")
+    print(f"{'total':<16} median {statistics.median(totals) * 1000:>8.1f} ms")
+    heavy = results[-1]["heavy"]
+    print(f"heavy modules loaded at startup: {', '.join(heavy) if heavy else 'none'}")
+
+    if args.max_seconds is not None and statistics.median(totals) > args.max_seconds:
+        sys.exit(f"Startup regressed: {statistics.median(totals):.2f}s > {args.max_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
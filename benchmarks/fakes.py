@@ -0,0 +1,174 @@
+# ---------- FILE: benchmarks/fakes.py ----------
+"""
+Just enough of discord.py's Interaction, Message and Attachment for the cogs'
+handlers to run offline, plus a local stand-in for the translation client.
+Everything a handler sends is appended to `.sent` so callers can check it.
+"""
+import asyncio
+import itertools
+
+_ids = itertools.count(10 ** 17)
+_messages = {}  # id -> FakeMessage, for FakeChannel.get_partial_message
+
+
+class FakePermissions:
+    def __init__(self, administrator: bool = True):
+        self.administrator = administrator
+
+
+class FakeUser:
+    def __init__(self, user_id: int = 1, admin: bool = True, bot: bool = False):
+        self.id = user_id
+        self.bot = bot
+        self.guild_permissions = FakePermissions(admin)
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int = 1):
+        self.id = guild_id
+        self.filesize_limit = 10 * 1024 * 1024  # an unboosted guild's upload limit
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int = 100):
+        self.id = channel_id
+
+    def get_partial_message(self, message_id: int) -> "FakeMessage":
+        return _messages[message_id]
+
+
+class FakeBot:
+    def get_partial_messageable(self, channel_id: int) -> FakeChannel:
+        return FakeChannel(channel_id)
+
+
+def _close_files(kwargs):
+    # discord.File opens paths eagerly; close them like a real send would
+    for file in ([kwargs["file"]] if kwargs.get("file") else []) + list(kwargs.get("files") or []):
+        file.close()
+
+
+class FakeResponse:
+    def __init__(self, sent: list):
+        self.sent = sent
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def send_message(self, content=None, **kwargs):
+        _close_files(kwargs)
+        self.sent.append(("send_message", content, kwargs))
+        self._done = True
+
+    async def defer(self, **kwargs):
+        self.sent.append(("defer", None, kwargs))
+        self._done = True
+
+    async def edit_message(self, **kwargs):
+        self.sent.append(("edit_message", None, kwargs))
+        self._done = True
+
+
+class FakeFollowup:
+    def __init__(self, sent: list):
+        self.sent = sent
+
+    async def send(self, content=None, **kwargs):
+        _close_files(kwargs)
+        self.sent.append(("followup", content, kwargs))
+
+
+class FakeInteraction:
+    def __init__(self, user: FakeUser = None, channel_id: int = 100, guild_id: int = 1):
+        self.sent = []
+        self.user = user or FakeUser()
+        self.channel = FakeChannel(channel_id)
+        self.channel_id = channel_id
+        self.guild = FakeGuild(guild_id)
+        self.guild_id = guild_id
+        self.response = FakeResponse(self.sent)
+        self.followup = FakeFollowup(self.sent)
+
+
+class FakeMessage:
+    def __init__(self, content: str, channel_id: int = 100, guild_id: int = 1, author: FakeUser = None):
+        self.id = next(_ids)
+        self.content = content
+        self.author = author or FakeUser(admin=False)
+        self.channel = FakeChannel(channel_id)
+        self.guild = FakeGuild(guild_id)
+        self.replies = []
+        self.deleted = False
+        _messages[self.id] = self
+
+    async def reply(self, content=None, **kwargs):
+        reply = FakeMessage(content, self.channel.id, self.guild.id, FakeUser(user_id=0, bot=True))
+        self.replies.append(reply)
+        return reply
+
+    async def edit(self, content=None, **kwargs):
+        self.content = content
+
+    async def delete(self):
+        self.deleted = True
+        _messages.pop(self.id, None)
+
+
+class FakeMessageEdit:
+    # discord.RawMessageUpdateEvent
+    def __init__(self, message: FakeMessage, content: str):
+        message.content = content
+        self.message = message
+        self.message_id = message.id
+        self.channel_id = message.channel.id
+        self.guild_id = message.guild.id
+
+
+class FakeMessageDelete:
+    # discord.RawMessageDeleteEvent
+    def __init__(self, message: FakeMessage):
+        self.message_id = message.id
+        self.channel_id = message.channel.id
+        self.guild_id = message.guild.id
+
+
+class FakeAttachment:
+    def __init__(self, data: bytes, filename: str = "upload.csv"):
+        self.data = data
+        self.filename = filename
+        self.size = len(data)
+
+    async def read(self) -> bytes:
+        return self.data
+
+
+# ---------- Translation Stub ----------
+class StubBatcher:
+    def stats(self) -> dict:
+        return {"batches": 0, "items": 0, "avg_batch_size": 0.0, "recent_avg_batch_size": 0.0,
+                "max_batch_size": 0, "queue_wait_p50": 0.0, "queue_wait_max": 0.0}
+
+
+class StubTranslationClient:
+    """
+    Drop-in for TranslationClient that "translates" locally after an
+    optional simulated provider latency.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.batcher = StubBatcher()
+
+    async def translate(self, text: str, src: str, tgt: str) -> str:
+        return (await self.translate_with_provider(text, src, tgt))[0]
+
+    async def translate_with_provider(self, text: str, src: str, tgt: str) -> tuple[str, str | None]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return f"[{tgt}] {text[::-1]}", None  # None: the pair's own provider
+
+    async def close(self):
+        pass
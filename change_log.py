@@ -0,0 +1,181 @@
+# ---------- FILE: change_log.py ----------
+import asyncio
+import datetime
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select, delete, func
+
+import channel_cache
+import leaderboard_index
+from name_index import NameIndex
+from channel_cache import ChannelConfig
+from database import engine, SessionLocal, IS_SQLITE, Channel, Name, CacheChange
+from config import CHANGE_POLL_INTERVAL, CHANGE_LOG_RETENTION
+
+log = logging.getLogger(__name__)
+
+# Identifies this process in cache_changes, so it skips what it wrote itself
+ORIGIN = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+# ---------- Writers (call inside the writing transaction) ----------
+def record(session, scope: str, key="") -> None:
+    session.add(CacheChange(origin=ORIGIN, scope=scope, key=str(key)))
+
+
+# ---------- Poller ----------
+class ChangePoller:
+    """
+    Keeps this process's channel and leaderboard caches in step with writes
+    made by other bot processes sharing the database.
+
+    Each poll is one `PRAGMA data_version` on a dedicated connection, a value
+    SQLite changes only when another connection has committed. The change log
+    is read only when it moved. Changes are fetched on the poll thread and
+    applied to the caches on the event loop.
+    """
+
+    def __init__(self, interval: float = CHANGE_POLL_INTERVAL, on_scores_changed=None):
+        self.interval = interval
+        self.on_scores_changed = on_scores_changed  # e.g. bump repo.score_version
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="change-poll")
+        self.last_id = 0
+        self.polls = 0
+        self.applied = 0
+        self._conn = None
+        self._data_version = None
+        self._task = None
+
+    # ---------- Poll Thread ----------
+    def _connection(self):
+        if self._conn is None:
+            # Autocommit: every statement sees the latest committed state
+            self._conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        return self._conn
+
+    def _changed(self) -> bool:
+        if not IS_SQLITE:
+            return True
+        version = self._connection().exec_driver_sql("PRAGMA data_version").scalar()
+        changed = version != self._data_version
+        self._data_version = version
+        return changed
+
+    def _prime(self):
+        self._changed()
+        self.last_id = self._connection().execute(select(func.coalesce(func.max(CacheChange.id), 0))).scalar()
+
+    def _fetch(self) -> list:
+        """
+        Returns cache actions for changes made by other processes since the
+        last poll, reading the rows they refer to.
+        """
+        self.polls += 1
+        if not self._changed():
+            return []
+        rows = self._connection().execute(
+            select(CacheChange.id, CacheChange.origin, CacheChange.scope, CacheChange.key)
+            .where(CacheChange.id > self.last_id)
+            .order_by(CacheChange.id)
+        ).all()
+        if not rows:
+            return []
+        gap = rows[0].id > self.last_id + 1 and self.last_id > 0  # rows pruned before we saw them
+        self.last_id = rows[-1].id
+        foreign = [row for row in rows if row.origin != ORIGIN]
+        if not foreign and not gap:
+            return []
+
+        session = SessionLocal()
+        try:
+            if gap or any(row.scope == "scores" for row in foreign):
+                indexes = leaderboard_index.build(session)
+                actions = [("indexes", indexes, NameIndex(indexes["kill"].names()))]
+            else:
+                name_ids = {int(row.key) for row in foreign if row.scope == "name"}
+                names = {row[0]: row for row in session.execute(
+                    select(Name.id, Name.name, Name.kill_score, Name.vs_score).where(Name.id.in_(name_ids))
+                )}
+                # In log order, so "remove bob" then "add bob" leaves bob tracked
+                actions = []
+                for row in foreign:
+                    if row.scope == "name" and int(row.key) in names:
+                        name_id, name, kill, vs = names[int(row.key)]
+                        actions.append(("name", name_id, name, kill or 0, vs or 0))
+                    elif row.scope == "name_removed":
+                        actions.append(("name_removed", row.key))
+            channel_ids = {row.key for row in foreign if row.scope == "channel"}
+            if gap:
+                actions.append(("channels", [ChannelConfig.from_row(row) for row in session.query(Channel).all()]))
+            elif channel_ids:
+                found = {row.channel_id: ChannelConfig.from_row(row)
+                         for row in session.query(Channel).filter(Channel.channel_id.in_(channel_ids))}
+                actions += [("channel", int(cid), found.get(cid)) for cid in channel_ids]
+            return actions
+        finally:
+            session.close()
+
+    def _prune(self):
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=CHANGE_LOG_RETENTION)
+        self._connection().execute(delete(CacheChange).where(CacheChange.created_at < cutoff))
+
+    # ---------- Event Loop ----------
+    def apply(self, actions: list):
+        scores_changed = False
+        for action in actions:
+            kind = action[0]
+            if kind == "indexes":
+                leaderboard_index.install(action[1], action[2])
+                scores_changed = True
+            elif kind == "name":
+                _, name_id, name, kill, vs = action
+                leaderboard_index.update("kill", name_id, name, kill)
+                leaderboard_index.update("vs", name_id, name, vs)
+                scores_changed = True
+            elif kind == "name_removed":
+                leaderboard_index.remove(action[1])
+                scores_changed = True
+            elif kind == "channel":
+                _, channel_id, config = action
+                if config is None:
+                    channel_cache.remove(channel_id)
+                else:
+                    channel_cache.put(config)
+            elif kind == "channels":
+                channel_cache.replace(action[1])
+        self.applied += len(actions)
+        if scores_changed and self.on_scores_changed is not None:
+            self.on_scores_changed()
+
+    async def poll_once(self):
+        loop = asyncio.get_running_loop()
+        self.apply(await loop.run_in_executor(self.executor, self._fetch))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._prime)
+        prune_every = max(int(60 / self.interval), 1)
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll_once()
+                if self.polls % prune_every == 0:
+                    await loop.run_in_executor(self.executor, self._prune)
+            except Exception:
+                log.exception("Change-log poll failed")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self.executor.submit(conn.close)
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,68 @@
+# ---------- FILE: channel_cache.py ----------
+import json
+from dataclasses import dataclass
+from database import SessionLocal, Channel
+
+
+# ---------- Channel Config ----------
+@dataclass(frozen=True)
+class ChannelConfig:
+    channel_id: int
+    lang1: str
+    lang2: str
+    flags: tuple
+
+    @classmethod
+    def from_row(cls, row: Channel) -> "ChannelConfig":
+        flags = tuple(json.loads(row.flags)) if row.flags else ()
+        return cls(channel_id=int(row.channel_id), lang1=row.lang1, lang2=row.lang2, flags=flags)
+
+
+# ---------- Process-wide Cache ----------
+# Keyed by the integer Discord channel id so the on_message hot path
+# is a single dict lookup with no string conversion or DB session.
+_configs: dict[int, ChannelConfig] = {}
+version = 0  # bumped on every change, for cache validators
+
+
+def load() -> int:
+    """
+    (Re)load every translator channel from the database into the cache.
+    """
+    session = SessionLocal()
+    try:
+        configs = [ChannelConfig.from_row(row) for row in session.query(Channel).all()]
+    finally:
+        session.close()
+    replace(configs)
+    return len(_configs)
+
+
+def _bump():
+    global version
+    version += 1
+
+
+def replace(configs):
+    global _configs
+    # Swap in a new dict rather than clear(), so lookups never see it empty
+    _configs = {config.channel_id: config for config in configs}
+    _bump()
+
+
+def get(channel_id) -> ChannelConfig | None:
+    return _configs.get(int(channel_id))
+
+
+def put(config: ChannelConfig):
+    _configs[config.channel_id] = config
+    _bump()
+
+
+def remove(channel_id):
+    if _configs.pop(int(channel_id), None) is not None:
+        _bump()
+
+
+def all_configs() -> list[ChannelConfig]:
+    return list(_configs.values())
@@ -0,0 +1,110 @@
+# ---------- FILE: charts.py ----------
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from config import CHART_WORKERS, CHART_CACHE_SIZE
+
+_theme_lock = threading.Lock()
+_theme_applied = False
+
+
+def _new_figure():
+    """
+    A standalone Figure (never registered with pyplot), so concurrent renders
+    share no global state and nothing is left behind once it is dropped.
+    """
+    global _theme_applied
+    with _theme_lock:
+        if not _theme_applied:
+            import seaborn as sns
+            sns.set_theme()
+            _theme_applied = True
+    from matplotlib.figure import Figure
+    return Figure()
+
+
+def _to_png(fig) -> bytes:
+    buf = BytesIO()
+    try:
+        fig.tight_layout()
+        fig.savefig(buf, format="png")
+    finally:
+        fig.clear()
+    return buf.getvalue()
+
+
+# ---------- Renderers (run on the chart pool) ----------
+def render_bar(title: str, labels: list, values: list) -> bytes:
+    fig = _new_figure()
+    ax = fig.subplots()
+    ax.bar(labels, values)
+    ax.set_ylabel("Score")
+    ax.set_title(title)
+    ax.tick_params(axis="x", labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+    return _to_png(fig)
+
+
+def render_pie(title: str, labels: list, values: list) -> bytes:
+    fig = _new_figure()
+    ax = fig.subplots()
+    ax.pie(values, labels=labels, autopct="%1.1f%%", startangle=90)
+    ax.set_title(title)
+    return _to_png(fig)
+
+
+def render_lines(title: str, series: dict) -> bytes:
+    """
+    One line per name; `series` maps name -> [(datetime, value), ...].
+    """
+    fig = _new_figure()
+    ax = fig.subplots()
+    for name, points in series.items():
+        if points:
+            xs, ys = zip(*points)
+            ax.plot(xs, ys, marker="o" if len(points) < 30 else None, markersize=3, label=name)
+    ax.set_ylabel("Score")
+    ax.set_title(title)
+    ax.legend(loc="best", fontsize="small")
+    fig.autofmt_xdate()
+    return _to_png(fig)
+
+
+# ---------- Renderer with Cache ----------
+class ChartRenderer:
+    """
+    Renders charts on a small thread pool and keeps the latest PNGs keyed by
+    the caller's cache key, e.g. (category, mode, data version).
+    """
+
+    def __init__(self, workers: int = CHART_WORKERS, cache_size: int = CHART_CACHE_SIZE):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="charts")
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> bytes | None:
+        png = self._cache.get(key)
+        if png is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._cache.move_to_end(key)
+        return png
+
+    async def render(self, key, render_fn, *args) -> bytes:
+        loop = asyncio.get_running_loop()
+        png = await loop.run_in_executor(self.executor, render_fn, *args)
+        self._cache[key] = png
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return png
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,64 @@
+# ---------- FILE: cogs/diagnostics.py ----------
+import asyncio
+import datetime
+from io import BytesIO
+
+import discord
+from discord.ext import commands
+from discord import app_commands
+import metrics
+from loop_monitor import LoopMonitor, sample_stacks, collapsed
+from config import PROFILE_MAX_SECONDS
+
+
+class DiagnosticsCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.monitor = LoopMonitor()
+        self._profiling = asyncio.Lock()
+        metrics.registry.collect("event_loop_blocked", "1 while the loop is blocked past the stall threshold",
+                                 lambda: int(self.monitor.stats()["blocked_now"]))
+
+    async def cog_load(self):
+        self.monitor.start()
+
+    async def cog_unload(self):
+        self.monitor.stop()
+
+    async def is_admin(self, interaction):
+        return interaction.user.guild_permissions.administrator
+
+    # ---------- Command ----------
+    @app_commands.command(name="profile", description="Sample the running bot and return a flame-graph stack file (Admin only)")
+    @app_commands.describe(seconds="How long to sample", scope="Which threads to sample")
+    @app_commands.choices(scope=[
+        app_commands.Choice(name="Event loop", value="loop"),
+        app_commands.Choice(name="All threads", value="all")
+    ])
+    async def profile(self, interaction, seconds: app_commands.Range[int, 1, PROFILE_MAX_SECONDS] = 10,
+                      scope: app_commands.Choice[str] = None):
+        if not await self.is_admin(interaction):
+            await interaction.response.send_message("❌ Admins only.", ephemeral=True)
+            return
+        if self._profiling.locked():
+            await interaction.response.send_message("⚠️ A profile is already running.", ephemeral=True)
+            return
+        scope_value = scope.value if scope else "loop"
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        thread_ids = {self.monitor.loop_thread_id} if scope_value == "loop" else None
+        async with self._profiling:
+            samples = await asyncio.to_thread(sample_stacks, seconds, thread_ids=thread_ids)
+
+        stamp = datetime.datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        data = collapsed(samples).encode("utf-8")
+        stats = self.monitor.stats()
+        summary = (
+            f"✅ {sum(samples.values()):,} samples over {seconds}s ({scope_value}), {len(samples):,} distinct stacks.\n"
+            f"Loop stalls recorded: {stats['stalls']}. Open with speedscope or `flamegraph.pl`."
+        )
+        file = discord.File(BytesIO(data), filename=f"profile-{scope_value}-{stamp}.collapsed")
+        await interaction.followup.send(summary, file=file, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(DiagnosticsCog(bot))
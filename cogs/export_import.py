@@ -2,16 +2,131 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from database import SessionLocal, Name, ScoreHistory
-import csv
-import pandas as pd
-from io import BytesIO
+from repository import repo
+import leaderboard_index
+import name_index
+from score_import import ImportSummary, read_csv_scores, read_excel_scores
+from exporter import ExportError, export_scores, export_history
+import asyncio
+import logging
+import os
+import tempfile
 from cogs.utilities import split_long_message
+from config import EXPORT_PART_LIMIT
+
+
+log = logging.getLogger(__name__)
+
+# New names checked for near-duplicates per import; each check is ~1 ms
+SUGGEST_MAX_CHECKS = 2000
+SUGGEST_MAX_SHOWN = 10
+# Discord's limits per message: total attachment bytes (outside guilds) and files
+DEFAULT_UPLOAD_LIMIT = 10 * 1024 * 1024
+MAX_FILES_PER_MESSAGE = 10
+
+
+def upload_groups(paths: list[str], upload_limit: int) -> list[list[str]]:
+    """
+    Splits export parts into messages whose attachments add up to at most
+    `upload_limit` bytes, and no more than MAX_FILES_PER_MESSAGE files each.
+    """
+    groups, group, group_bytes = [], [], 0
+    for path in paths:
+        size = os.path.getsize(path)
+        if group and (group_bytes + size > upload_limit or len(group) == MAX_FILES_PER_MESSAGE):
+            groups.append(group)
+            group, group_bytes = [], 0
+        group.append(path)
+        group_bytes += size
+    if group:
+        groups.append(group)
+    return groups
 
 
 class ExportImportCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+
+    # ---------- Import Helpers ----------
+    @staticmethod
+    async def run_import(reader, file_bytes: bytes, category: str, dry_run: bool) -> tuple[ImportSummary, list]:
+        """
+        Returns the summary and (new name, existing names it resembles) pairs.
+        """
+        # Parsing runs in a worker thread and the bulk write on the DB thread
+        df = await asyncio.to_thread(reader, file_bytes)
+        summary = await repo.import_scores(df, category, dry_run)
+        # Before the index learns the new names, so they only match older ones
+        suggestions = await ExportImportCog.near_duplicates(summary.new_names)
+        for name_id, name, value in summary.changes:
+            leaderboard_index.add_name(name_id, name)
+            leaderboard_index.update(summary.category, name_id, name, value)
+        return summary, suggestions
+
+    async def import_file(self, interaction, reader, attachment, category: str, dry_run: bool):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            file_bytes = await attachment.read()
+            summary, suggestions = await self.run_import(reader, file_bytes, category, dry_run)
+        except Exception as e:
+            # The deferred "thinking" response must still get an answer
+            log.exception("Import of %s failed", attachment.filename)
+            await interaction.followup.send(f"❌ Import failed: {e}", ephemeral=True)
+            return
+        for chunk in split_long_message(self.format_summary(category, summary) + self.format_suggestions(suggestions)):
+            await interaction.followup.send(chunk, ephemeral=True)
+
+    @staticmethod
+    async def near_duplicates(new_names: list) -> list[tuple[str, list]]:
+        found = []
+        for i, name in enumerate(new_names[:SUGGEST_MAX_CHECKS]):
+            matches = name_index.suggest(name)
+            if matches:
+                found.append((name, matches))
+                if len(found) >= SUGGEST_MAX_SHOWN:
+                    break
+            if i % 100 == 99:
+                await asyncio.sleep(0)  # let other events through on big imports
+        return found
+
+    @staticmethod
+    def format_suggestions(suggestions: list) -> str:
+        if not suggestions:
+            return ""
+        lines = [f"• {name} → did you mean {', '.join(matches)}?" for name, matches in suggestions]
+        return "\n⚠️ New names that look like existing ones:\n" + "\n".join(lines)
+
+    @staticmethod
+    def format_summary(category: str, summary: ImportSummary) -> str:
+        if summary.dry_run:
+            return (f"🔎 Dry run for {category}: would add {summary.inserted:,} new, update {summary.updated:,}, "
+                    f"ignore {summary.ignored:,} ({summary.parsed:,} rows parsed, {summary.skipped:,} skipped)")
+        return (f"✅ Imported into {category}. Updated: {summary.changed:,} ({summary.inserted:,} new), "
+                f"Ignored: {summary.ignored:,}, Skipped: {summary.skipped:,}")
+
+    # ---------- Export Helper ----------
+    async def send_export(self, interaction, export_fn, *args):
+        """
+        Streams the export into temp files on the DB read thread and sends
+        them as attachments, several messages if there are many parts. Parts
+        and messages both stay within the guild's upload limit.
+        """
+        await interaction.response.defer(thinking=True)
+        upload_limit = interaction.guild.filesize_limit if interaction.guild else DEFAULT_UPLOAD_LIMIT
+        part_limit = min(EXPORT_PART_LIMIT, upload_limit)
+        try:
+            with tempfile.TemporaryDirectory(prefix="export-") as directory:
+                paths = await repo.run_readonly(export_fn, *args, directory, part_limit)
+                for group in upload_groups(paths, upload_limit):
+                    await interaction.followup.send(files=[discord.File(path) for path in group])
+        except ExportError as e:
+            # The deferred response is public, so this answer is too
+            await interaction.followup.send(f"❌ {e}")
+        except Exception as e:
+            # The deferred "thinking" response must still get an answer
+            log.exception("Export with %s failed", export_fn.__name__)
+            await interaction.followup.send(f"❌ Export failed: {e}")
+
         # ---------- Export CSV ----------
     @app_commands.command(name="exportcsv", description="Export scores to CSV")
     @app_commands.describe(category="Choose score type to export", showdiff="Include diff column?")
@@ -24,90 +139,24 @@ class ExportImportCog(commands.Cog):
         app_commands.Choice(name="No", value="no")
     ])
     async def exportcsv(self, interaction, category: app_commands.Choice[str], showdiff: app_commands.Choice[str] = None):
-        session = SessionLocal()
-        try:
-            names = session.query(Name).all()
-            if not names:
-                await interaction.response.send_message("⚠️ No data to export.", ephemeral=True)
-                return
-
-            output = BytesIO()
-            writer = csv.writer(output)
-            if showdiff and showdiff.value == "yes":
-                writer.writerow(["Name", "Δ"])
-            else:
-                writer.writerow(["Name", "Score"])
-
-            for n in names:
-                val = n.kill_score if category.value == "kill" else n.vs_score
-                if showdiff and showdiff.value == "yes":
-                    latest = session.query(ScoreHistory).filter_by(name_id=n.id, category=category.value).order_by(ScoreHistory.timestamp.desc()).first()
-                    prev = session.query(ScoreHistory).filter_by(name_id=n.id, category=category.value).order_by(ScoreHistory.timestamp.desc()).offset(1).first()
-                    if latest and prev:
-                        diff = latest.value - prev.value
-                    else:
-                        diff = latest.value if latest else 0
-                    writer.writerow([n.name, f"{diff:,}"])
-                else:
-                    writer.writerow([n.name, f"{val:,}"])
-
-            output.seek(0)
-            await interaction.response.send_message(file=discord.File(output, filename=f"{category.value}_scores.csv"))
-        finally:
-            session.close()
+        if not len(leaderboard_index.get(category.value)):
+            await interaction.response.send_message("⚠️ No data to export.", ephemeral=True)
+            return
+        await self.send_export(interaction, export_scores, category.value, showdiff is not None and showdiff.value == "yes", "csv")
             # ---------- Import CSV ----------
     @app_commands.command(name="importcsv", description="Import scores from a CSV file (Admin only)")
-    @app_commands.describe(category="kill or vs", showdiff="Expect diff column?")
+    @app_commands.describe(category="kill or vs", showdiff="Expect diff column?", dryrun="Only report what would change?")
     @app_commands.choices(showdiff=[
         app_commands.Choice(name="Yes", value="yes"),
         app_commands.Choice(name="No", value="no")
     ])
-    async def importcsv(self, interaction, category: str, attachment: discord.Attachment, showdiff: app_commands.Choice[str] = None):
-        session = SessionLocal()
-        try:
-            file_bytes = await attachment.read()
-            lines = file_bytes.decode("utf-8").splitlines()
-            reader = csv.reader(lines)
-            headers = next(reader, None)
-            updated, ignored = 0, 0
-
-            for row in reader:
-                if len(row) < 2:
-                    continue
-                name = row[0].strip()
-                score_cell = row[1].strip()
-                if "(" in score_cell:
-                    score_cell = score_cell.split("(")[0].strip()
-
-                try:
-                    val = int(score_cell.replace(',', ''))
-                except:
-                    continue
-
-                name_obj = session.query(Name).filter_by(name=name).first()
-                if not name_obj:
-                    name_obj = Name(name=name)
-                    if category.lower() == "kill":
-                        name_obj.kill_score = val
-                    else:
-                        name_obj.vs_score = val
-                    session.add(name_obj)
-                    updated += 1
-                else:
-                    prev_val = name_obj.kill_score if category.lower() == "kill" else name_obj.vs_score
-                    if val > prev_val:
-                        if category.lower() == "kill":
-                            name_obj.kill_score = val
-                        else:
-                            name_obj.vs_score = val
-                        updated += 1
-                    else:
-                        ignored += 1
-
-            session.commit()
-            await interaction.response.send_message(f"✅ Imported into {category}. Updated: {updated}, Ignored: {ignored}", ephemeral=True)
-        finally:
-            session.close()
+    @app_commands.choices(dryrun=[
+        app_commands.Choice(name="Yes", value="yes"),
+        app_commands.Choice(name="No", value="no")
+    ])
+    async def importcsv(self, interaction, category: str, attachment: discord.Attachment, showdiff: app_commands.Choice[str] = None, dryrun: app_commands.Choice[str] = None):
+        await self.import_file(interaction, read_csv_scores, attachment, category, dryrun is not None and dryrun.value == "yes")
+
             # ---------- Export Excel ----------
     @app_commands.command(name="exportexcel", description="Export scores to Excel")
     @app_commands.describe(category="Choose score type to export", showdiff="Include diff column?")
@@ -120,84 +169,55 @@ class ExportImportCog(commands.Cog):
         app_commands.Choice(name="No", value="no")
     ])
     async def exportexcel(self, interaction, category: app_commands.Choice[str], showdiff: app_commands.Choice[str] = None):
-        session = SessionLocal()
-        try:
-            names = session.query(Name).all()
-            if not names:
-                await interaction.response.send_message("⚠️ No data to export.", ephemeral=True)
-                return
-
-            data = []
-            for n in names:
-                val = n.kill_score if category.value == "kill" else n.vs_score
-                if showdiff and showdiff.value == "yes":
-                    latest = session.query(ScoreHistory).filter_by(name_id=n.id, category=category.value).order_by(ScoreHistory.timestamp.desc()).first()
-                    prev = session.query(ScoreHistory).filter_by(name_id=n.id, category=category.value).order_by(ScoreHistory.timestamp.desc()).offset(1).first()
-                    if latest and prev:
-                        diff = latest.value - prev.value
-                    else:
-                        diff = latest.value if latest else 0
-                    data.append({"Name": n.name, "Δ": diff})
-                else:
-                    data.append({"Name": n.name, "Score": val})
-
-            df = pd.DataFrame(data)
-            output = BytesIO()
-            df.to_excel(output, index=False)
-            output.seek(0)
-            await interaction.response.send_message(file=discord.File(output, filename=f"{category.value}_scores.xlsx"))
-        finally:
-            session.close()
+        if not len(leaderboard_index.get(category.value)):
+            await interaction.response.send_message("⚠️ No data to export.", ephemeral=True)
+            return
+        await self.send_export(interaction, export_scores, category.value, showdiff is not None and showdiff.value == "yes", "xlsx")
+
+    # ---------- Export (any format) ----------
+    @app_commands.command(name="exportdata", description="Export scores or full score history as CSV, gzip CSV, Excel or Parquet")
+    @app_commands.describe(dataset="Current scores or every recorded score change", category="Choose score type to export",
+                           format="File format", showdiff="Include diff column? (scores only)")
+    @app_commands.choices(dataset=[
+        app_commands.Choice(name="Scores", value="scores"),
+        app_commands.Choice(name="Full History", value="history")
+    ])
+    @app_commands.choices(category=[
+        app_commands.Choice(name="Kill Score", value="kill"),
+        app_commands.Choice(name="VS Score", value="vs")
+    ])
+    @app_commands.choices(format=[
+        app_commands.Choice(name="CSV", value="csv"),
+        app_commands.Choice(name="CSV (gzip)", value="csv.gz"),
+        app_commands.Choice(name="Excel", value="xlsx"),
+        app_commands.Choice(name="Parquet", value="parquet")
+    ])
+    @app_commands.choices(showdiff=[
+        app_commands.Choice(name="Yes", value="yes"),
+        app_commands.Choice(name="No", value="no")
+    ])
+    async def exportdata(self, interaction, dataset: app_commands.Choice[str], category: app_commands.Choice[str], format: app_commands.Choice[str], showdiff: app_commands.Choice[str] = None):
+        if dataset.value == "history":
+            await self.send_export(interaction, export_history, category.value, format.value)
+            return
+        if not len(leaderboard_index.get(category.value)):
+            await interaction.response.send_message("⚠️ No data to export.", ephemeral=True)
+            return
+        await self.send_export(interaction, export_scores, category.value, showdiff is not None and showdiff.value == "yes", format.value)
 
     # ---------- Import Excel ----------
     @app_commands.command(name="importexcel", description="Import scores from Excel (Admin only)")
-    @app_commands.describe(category="kill or vs", showdiff="Expect diff column?")
+    @app_commands.describe(category="kill or vs", showdiff="Expect diff column?", dryrun="Only report what would change?")
     @app_commands.choices(showdiff=[
         app_commands.Choice(name="Yes", value="yes"),
         app_commands.Choice(name="No", value="no")
     ])
-    async def importexcel(self, interaction, category: str, attachment: discord.Attachment, showdiff: app_commands.Choice[str] = None):
-        session = SessionLocal()
-        try:
-            file_bytes = await attachment.read()
-            df = pd.read_excel(BytesIO(file_bytes))
-            updated, ignored = 0, 0
-
-            for _, row in df.iterrows():
-                name = str(row["Name"])
-                score_cell = str(row.get("Score", "0")).strip()
-                if "(" in score_cell:
-                    score_cell = score_cell.split("(")[0].strip()
-
-                try:
-                    val = int(float(score_cell))
-                except:
-                    continue
-
-                name_obj = session.query(Name).filter_by(name=name).first()
-                if not name_obj:
-                    name_obj = Name(name=name)
-                    if category.lower() == "kill":
-                        name_obj.kill_score = val
-                    else:
-                        name_obj.vs_score = val
-                    session.add(name_obj)
-                    updated += 1
-                else:
-                    prev_val = name_obj.kill_score if category.lower() == "kill" else name_obj.vs_score
-                    if val > prev_val:
-                        if category.lower() == "kill":
-                            name_obj.kill_score = val
-                        else:
-                            name_obj.vs_score = val
-                        updated += 1
-                    else:
-                        ignored += 1
-
-            session.commit()
-            await interaction.response.send_message(f"✅ Imported into {category}. Updated: {updated}, Ignored: {ignored}", ephemeral=True)
-        finally:
-            session.close()
+    @app_commands.choices(dryrun=[
+        app_commands.Choice(name="Yes", value="yes"),
+        app_commands.Choice(name="No", value="no")
+    ])
+    async def importexcel(self, interaction, category: str, attachment: discord.Attachment, showdiff: app_commands.Choice[str] = None, dryrun: app_commands.Choice[str] = None):
+        await self.import_file(interaction, read_excel_scores, attachment, category, dryrun is not None and dryrun.value == "yes")
 
 
 async def setup(bot):
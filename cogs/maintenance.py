@@ -0,0 +1,76 @@
+# ---------- FILE: cogs/maintenance.py ----------
+import logging
+
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands
+from repository import repo
+from config import HISTORY_RETENTION_DAYS, MAINTENANCE_INTERVAL_HOURS, PRIMARY_PROCESS
+
+log = logging.getLogger(__name__)
+
+
+def format_report(report) -> str:
+    lines = [
+        f"Orphaned rows deleted: {report.orphans_deleted:,}",
+        f"History rows compacted: {report.rows_compacted:,}",
+        f"Daily rollup rows written: {report.rollup_rows:,}",
+        f"Space reclaimed: {report.bytes_reclaimed / 1024:,.0f} KiB",
+        f"Took: {report.seconds:.1f}s",
+    ]
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+class MaintenanceCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        # With several shard processes only one runs the scheduled job
+        if PRIMARY_PROCESS:
+            self.history_maintenance.start()
+
+    async def cog_unload(self):
+        self.history_maintenance.cancel()
+
+    async def is_admin(self, interaction):
+        return interaction.user.guild_permissions.administrator
+
+    # ---------- Background Task ----------
+    @tasks.loop(hours=MAINTENANCE_INTERVAL_HOURS)
+    async def history_maintenance(self):
+        try:
+            report = await repo.run_maintenance(HISTORY_RETENTION_DAYS)
+        except Exception:
+            log.exception("History maintenance failed")
+            return
+        log.info("History maintenance: %s", report)
+
+    @history_maintenance.before_loop
+    async def before_history_maintenance(self):
+        # Keep the first run out of the startup path
+        await self.bot.wait_until_ready()
+
+    # ---------- Command ----------
+    @app_commands.command(name="maintenance", description="Compact old history and reclaim disk space (Admin only; first run rebuilds the whole DB)")
+    async def maintenance(self, interaction):
+        if not await self.is_admin(interaction):
+            await interaction.response.send_message("❌ Admins only.", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            report = await repo.run_maintenance(HISTORY_RETENTION_DAYS)
+        except Exception as e:
+            # The deferred "thinking" response must still get an answer
+            log.exception("History maintenance failed")
+            await interaction.followup.send(f"❌ Maintenance failed: {e}", ephemeral=True)
+            return
+        embed = discord.Embed(
+            title=f"History Maintenance (keeping {HISTORY_RETENTION_DAYS} days raw)",
+            description=format_report(report), color=0x00ff00
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(MaintenanceCog(bot))
@@ -2,50 +2,46 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from database import SessionLocal, Name, ScoreHistory
-from cogs.utilities import split_long_message
-import matplotlib.pyplot as plt
-import matplotlib
-import seaborn as sns
+from repository import repo, ScoreUpdate
+import leaderboard_index
+import name_index
+import metrics
+from cogs.utilities import split_long_message, PaginatedView, name_autocomplete, names_autocomplete
+from config import PAGE_SIZE
+from score_history import window_key
+from charts import ChartRenderer, render_bar, render_pie, render_lines
 from io import BytesIO
 from tabulate import tabulate
+import logging
 
-matplotlib.use("Agg")
-sns.set_theme()
+
+log = logging.getLogger(__name__)
 
 
 class ScoringCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.charts = ChartRenderer()
+        metrics.registry.collect("chart_cache_hit_ratio", "Chart PNG cache hits / lookups", self._chart_hit_ratio)
+
+    def _chart_hit_ratio(self) -> float:
+        lookups = self.charts.hits + self.charts.misses
+        return self.charts.hits / lookups if lookups else 0.0
+
+    async def cog_unload(self):
+        self.charts.close()
 
     async def is_admin(self, interaction):
         return interaction.user.guild_permissions.administrator
 
     # ---------- Helper function for score rule ----------
-    def update_score(self, session, name_obj: Name, new_val: int, category: str):
-        if category == "kill":
-            current = name_obj.kill_score
-        else:
-            current = name_obj.vs_score
-
-        if current is None or current == 0:
-            if category == "kill":
-                name_obj.kill_score = new_val
-            else:
-                name_obj.vs_score = new_val
-            session.add(ScoreHistory(name=name_obj, category=category, value=new_val))
-            return new_val, new_val, True
-
-        if new_val > current:
-            diff = new_val - current
-            if category == "kill":
-                name_obj.kill_score = new_val
-            else:
-                name_obj.vs_score = new_val
-            session.add(ScoreHistory(name=name_obj, category=category, value=new_val))
-            return new_val, diff, True
-
-        return current, 0, False
+    async def update_score(self, name: str, new_val: int, category: str) -> ScoreUpdate:
+        result = await repo.upsert_score(name, category, new_val)
+        if result.created:
+            leaderboard_index.add_name(result.name_id, name)
+        if result.updated:
+            leaderboard_index.update(category, result.name_id, name, result.new_total)
+        return result
 
     # ---------- Add/Update Score ----------
     @app_commands.command(name="addscore", description="Add or update a score for a name (Admin only)")
@@ -58,34 +54,27 @@ class ScoringCog(commands.Cog):
         app_commands.Choice(name="Yes", value="yes"),
         app_commands.Choice(name="No", value="no")
     ])
+    @app_commands.autocomplete(name=name_autocomplete)
     async def addscore(self, interaction: discord.Interaction, category: app_commands.Choice[str], name: str, value: int, showdiff: app_commands.Choice[str] = None):
         if not await self.is_admin(interaction):
             await interaction.response.send_message("❌ Admins only.", ephemeral=True)
             return
 
-        session = SessionLocal()
-        try:
-            obj = session.query(Name).filter_by(name=name).first()
-            if not obj:
-                obj = Name(name=name)
-                session.add(obj)
-                session.commit()
-                session.refresh(obj)
-
-            new_total, diff, updated = self.update_score(session, obj, value, category.value)
-            session.commit()
-
-            emoji = "🔥" if category.value == "kill" else "🛠"
-            if updated:
-                if showdiff and showdiff.value == "yes":
-                    await interaction.response.send_message(f"✅ {category.name} updated: {name} = +{diff:,} {emoji}", ephemeral=True)
-                else:
-                    await interaction.response.send_message(f"✅ {category.name} updated: {name} = {new_total:,} {emoji}", ephemeral=True)
+        # Looked up before the write, while a typo is still not a tracked name
+        suggestions = name_index.suggest(name)
+        result = await self.update_score(name, value, category.value)
+
+        emoji = "🔥" if category.value == "kill" else "🛠"
+        if result.updated:
+            if showdiff and showdiff.value == "yes":
+                msg = f"✅ {category.name} updated: {name} = +{result.diff:,} {emoji}"
             else:
-                current = obj.kill_score if category.value == "kill" else obj.vs_score
-                await interaction.response.send_message(f"⚠️ Ignored update: {name} already has a higher or equal score ({current:,}).", ephemeral=True)
-        finally:
-            session.close()
+                msg = f"✅ {category.name} updated: {name} = {result.new_total:,} {emoji}"
+            if result.created and suggestions:
+                msg += f"\n⚠️ {name} is a new name. Did you mean {', '.join(suggestions)}?"
+            await interaction.response.send_message(msg, ephemeral=True)
+        else:
+            await interaction.response.send_message(f"⚠️ Ignored update: {name} already has a higher or equal score ({result.new_total:,}).", ephemeral=True)
 
     # ---------- Show Scores ----------
     @app_commands.command(name="showscores", description="Show scores as table, bar chart, or pie chart")
@@ -104,79 +93,157 @@ class ScoringCog(commands.Cog):
         app_commands.Choice(name="No", value="no")
     ])
     async def showscores(self, interaction, category: app_commands.Choice[str], mode: app_commands.Choice[str], showdiff: app_commands.Choice[str] = None):
-        session = SessionLocal()
-        try:
-            names = session.query(Name).all()
-            if not names:
-                await interaction.response.send_message("⚠️ No scores available.", ephemeral=True)
-                return
-
-            data = {}
-            for n in names:
-                val = n.kill_score if category.value == "kill" else n.vs_score
-                data[n.name] = val if val is not None else 0
-
-            sorted_data = dict(sorted(data.items(), key=lambda x: x[1], reverse=True))
-            emoji = "🔥" if category.value == "kill" else "🛠"
-
-            if mode.value == "table":
-                table_lines = []
-                for i, (nm, val) in enumerate(sorted_data.items(), start=1):
-                    name_obj = session.query(Name).filter_by(name=nm).first()
-                    prev_hist = session.query(ScoreHistory).filter_by(name_id=name_obj.id, category=category.value).order_by(ScoreHistory.timestamp.desc()).offset(1).first()
-                    prev_val = prev_hist.value if prev_hist else 0
-                    diff = val - prev_val
-                    if showdiff and showdiff.value == "yes":
-                        line = f"#{i} {nm} {diff:+,} {emoji}"
-                    else:
-                        line = f"#{i} {nm} {val:,} {emoji}"
-                    table_lines.append(line)
-
-                table_str = "\n".join(table_lines)
-                embed = discord.Embed(title=f"{category.name} Table", description=f"```\n{table_str}\n```", color=0x8B0000)
-                await interaction.response.send_message(embed=embed)
-
-            elif mode.value == "bar":
-                fig, ax = plt.subplots()
-                ax.bar(sorted_data.keys(), sorted_data.values())
-                ax.set_ylabel("Score")
-                ax.set_title(f"{category.name}")
-                plt.xticks(rotation=45, ha="right")
-
-                buf = BytesIO()
-                plt.tight_layout()
-                plt.savefig(buf, format="png")
-                buf.seek(0)
-                await interaction.response.send_message(file=discord.File(buf, filename="barchart.png"))
-
-            elif mode.value == "pie":
-                fig, ax = plt.subplots()
-                ax.pie(sorted_data.values(), labels=sorted_data.keys(), autopct="%1.1f%%", startangle=90)
-                ax.set_title(f"{category.name} (Pie Chart)")
-
-                buf = BytesIO()
-                plt.tight_layout()
-                plt.savefig(buf, format="png")
-                buf.seek(0)
-                await interaction.response.send_message(file=discord.File(buf, filename="piechart.png"))
-
-        finally:
-            session.close()
+        emoji = "🔥" if category.value == "kill" else "🛠"
+
+        index = leaderboard_index.get(category.value)
+        if not len(index):
+            await interaction.response.send_message("⚠️ No scores available.", ephemeral=True)
+            return
+
+        if mode.value == "table":
+            if showdiff and showdiff.value == "yes":
+                # Diffs need history, so each page is one keyset query on (score, id)
+                async def fetch(cursor):
+                    offset, after = cursor or (0, None)
+                    rows = await repo.leaderboard_page(category.value, after, PAGE_SIZE + 1)
+                    lines = [f"#{offset + i} {d.name} {d.delta:+,} {emoji}" for i, d in enumerate(rows[:PAGE_SIZE], start=1)]
+                    if len(rows) <= PAGE_SIZE:
+                        return lines, None
+                    last = rows[PAGE_SIZE - 1]
+                    return lines, (offset + PAGE_SIZE, (last.current, last.name_id))
+            else:
+                async def fetch(cursor):
+                    offset = cursor or 0
+                    lines = [f"#{rank} {nm} {val:,} {emoji}" for rank, nm, val in index.top(PAGE_SIZE, offset)]
+                    return lines, offset + PAGE_SIZE if offset + PAGE_SIZE < len(index) else None
+
+            view = PaginatedView(f"{category.name} Table", fetch, owner_id=interaction.user.id)
+            await view.start(interaction)
+            return
+
+        # Charts only change when scores do, so the data version is part of the key
+        key = (category.value, mode.value, repo.score_version)
+        png = self.charts.get(key)
+        if png is None:
+            await interaction.response.defer(thinking=True)
+            ranked = index.top(len(index))
+            labels = [nm for _, nm, _ in ranked]
+            values = [val for _, _, val in ranked]
+            if mode.value == "bar":
+                png = await self.charts.render(key, render_bar, f"{category.name}", labels, values)
+            else:
+                png = await self.charts.render(key, render_pie, f"{category.name} (Pie Chart)", labels, values)
+            await interaction.followup.send(file=discord.File(BytesIO(png), filename=f"{mode.value}chart.png"))
+            return
+
+        await interaction.response.send_message(file=discord.File(BytesIO(png), filename=f"{mode.value}chart.png"))
 
     # ---------- Remove Name ----------
     @app_commands.command(name="removename", description="Remove a tracked name (Admin only)")
+    @app_commands.autocomplete(name=name_autocomplete)
     async def removename(self, interaction, name: str):
         if not await self.is_admin(interaction):
             await interaction.response.send_message("❌ Admins only.", ephemeral=True)
             return
-        session = SessionLocal()
+        if await repo.remove_name(name) is None:
+            await interaction.response.send_message("⚠️ Name not found.", ephemeral=True)
+            return
+        leaderboard_index.remove(name)
+        await interaction.response.send_message(f"✅ Removed {name}.", ephemeral=True)
+
+    # ---------- Rank / Top ----------
+    @app_commands.command(name="rank", description="Show a name's rank and the names around it")
+    @app_commands.describe(category="Choose score type", name="Name to look up")
+    @app_commands.choices(category=[
+        app_commands.Choice(name="Kill Score", value="kill"),
+        app_commands.Choice(name="VS Score", value="vs")
+    ])
+    @app_commands.autocomplete(name=name_autocomplete)
+    async def rank(self, interaction, category: app_commands.Choice[str], name: str):
+        index = leaderboard_index.get(category.value)
+        found = index.rank_of(name)
+        if found is None:
+            await interaction.response.send_message("⚠️ Name not found.", ephemeral=True)
+            return
+        emoji = "🔥" if category.value == "kill" else "🛠"
+        lines = []
+        for rank, nm, val in index.neighbours(name):
+            marker = "➤" if nm == name else " "
+            lines.append(f"{marker} #{rank} {nm} {val:,} {emoji}")
+        embed = discord.Embed(
+            title=f"{name}: #{found[0]} of {len(index):,} ({category.name})",
+            description="```\n" + "\n".join(lines) + "\n```",
+            color=0x8B0000
+        )
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="top", description="Show the top names for a score type")
+    @app_commands.describe(category="Choose score type", count="How many names to show (1-50)")
+    @app_commands.choices(category=[
+        app_commands.Choice(name="Kill Score", value="kill"),
+        app_commands.Choice(name="VS Score", value="vs")
+    ])
+    async def top(self, interaction, category: app_commands.Choice[str], count: app_commands.Range[int, 1, 50] = 10):
+        index = leaderboard_index.get(category.value)
+        if not len(index):
+            await interaction.response.send_message("⚠️ No scores available.", ephemeral=True)
+            return
+        emoji = "🔥" if category.value == "kill" else "🛠"
+        lines = [f"#{rank} {nm} {val:,} {emoji}" for rank, nm, val in index.top(count)]
+        embed = discord.Embed(title=f"Top {len(lines)} — {category.name}", description="```\n" + "\n".join(lines) + "\n```", color=0x8B0000)
+        await interaction.response.send_message(embed=embed)
+
+    # ---------- History ----------
+    @app_commands.command(name="history", description="Plot score progression for one or more names")
+    @app_commands.describe(category="Choose score type", names="Comma-separated names to compare (up to 10)",
+                           period="Time range", bucket="Point spacing (defaults to one that suits the period)")
+    @app_commands.choices(category=[
+        app_commands.Choice(name="Kill Score", value="kill"),
+        app_commands.Choice(name="VS Score", value="vs")
+    ])
+    @app_commands.choices(period=[
+        app_commands.Choice(name="Last 7 days", value="7d"),
+        app_commands.Choice(name="Last 30 days", value="30d"),
+        app_commands.Choice(name="Last 90 days", value="90d"),
+        app_commands.Choice(name="Last year", value="365d"),
+        app_commands.Choice(name="All time", value="all")
+    ])
+    @app_commands.choices(bucket=[
+        app_commands.Choice(name="Hourly", value="hour"),
+        app_commands.Choice(name="Daily", value="day"),
+        app_commands.Choice(name="Weekly", value="week")
+    ])
+    @app_commands.autocomplete(names=names_autocomplete)
+    async def history(self, interaction, category: app_commands.Choice[str], names: str, period: app_commands.Choice[str], bucket: app_commands.Choice[str] = None):
+        wanted = list(dict.fromkeys(n.strip() for n in names.split(",") if n.strip()))[:10]
+        index = leaderboard_index.get(category.value)
+        missing = [n for n in wanted if index.rank_of(n) is None]
+        wanted = [n for n in wanted if n not in missing]
+        if not wanted:
+            await interaction.response.send_message("⚠️ Name not found.", ephemeral=True)
+            return
+
+        await interaction.response.defer(thinking=True)
+        bucket_value = bucket.value if bucket else None
+        key = ("history", tuple(wanted), category.value, period.value, bucket_value,
+               window_key(period.value, bucket_value), repo.score_version)
         try:
-            obj = session.query(Name).filter_by(name=name).first()
-            if not obj:
-                await interaction.response.send_message("⚠️ Name not found.", ephemeral=True)
-                return
-            session.delete(obj)
-            session.commit()
-            await interaction.response.send_message(f"✅ Removed {name}.", ephemeral=True)
-        finally:
-            session.close()
+            png = self.charts.get(key)
+            if png is None:
+                series = await repo.history_series(wanted, category.value, period.value, bucket_value)
+                if not any(series.values()):
+                    # The deferred response is public, so this answer is too
+                    await interaction.followup.send("⚠️ No history recorded for that period.")
+                    return
+                png = await self.charts.render(key, render_lines, f"{category.name} — {period.name}", series)
+        except Exception as e:
+            # The deferred "thinking" response must still get an answer
+            log.exception("History chart for %s failed", ", ".join(wanted))
+            await interaction.followup.send(f"❌ Could not build the chart: {e}")
+            return
+        note = f"⚠️ Not found: {', '.join(missing)}" if missing else None
+        await interaction.followup.send(content=note, file=discord.File(BytesIO(png), filename="history.png"))
+
+
+async def setup(bot):
+    await bot.add_cog(ScoringCog(bot))
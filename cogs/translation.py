@@ -1,45 +1,99 @@
 # ---------- FILE: cogs/translation.py ----------
-import json
-import requests
+import asyncio
+from collections import Counter
 from discord.ext import commands
 from discord import app_commands
-from langdetect import detect, LangDetectException
-from googletrans import Translator
-from database import SessionLocal, Channel
-from config import HF_MODELS, HF_KEY, DEFAULT_FLAGS
+import channel_cache
+from repository import repo
+from translation_providers import TranslationClient, ProviderError
+from translation_cache import TranslationCache, provider_for
+from translation_scheduler import FairScheduler
+from language_detection import LanguageDetector
+from text_segments import segment_text, join_segments
+from reply_map import ReplyMap, segment_hashes
+import metrics
+from config import DEFAULT_FLAGS, TRANSLATE_SEGMENT_CONCURRENCY
+from cogs.utilities import split_long_message, PaginatedView
 
 import discord
 
-HF_HEADERS = {"Authorization": f"Bearer {HF_KEY}"} if HF_KEY else {}
-translator = Translator()
-
 class TranslationCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.client = TranslationClient()
+        self.cache = TranslationCache()
+        self.detector = LanguageDetector()
+        self.scheduler = FairScheduler(self._translate_and_store)
+        self.replies = ReplyMap()
+        self.edit_events = Counter()  # retranslated, segments_changed, unchanged, deleted
+        metrics.registry.collect("translation_cache_hit_ratio", "Translation cache hits / lookups",
+                                 lambda: self.cache.stats()["hit_ratio"])
+        metrics.registry.collect("translation_cache_lookups_total", "Translation cache lookups by outcome",
+                                 self._cache_lookups, kind="counter")
+        metrics.registry.collect("translation_queue_depth", "Messages waiting for a translation slot",
+                                 self.scheduler.queue_depth)
+        metrics.registry.collect("translation_scheduler_events_total", "Scheduler admissions by outcome",
+                                 lambda: {(("event", k),): v for k, v in self.scheduler.events.items()}, kind="counter")
+        metrics.registry.collect("translation_batch_size_avg", "Average HF micro-batch size",
+                                 lambda: self.client.batcher.stats()["avg_batch_size"])
+        metrics.registry.collect("translation_reply_map_entries", "Translated messages tracked for edits/deletes",
+                                 lambda: len(self.replies))
+        metrics.registry.collect("translation_edit_events_total", "Edited/deleted source messages by outcome",
+                                 lambda: {(("event", k),): v for k, v in self.edit_events.items()}, kind="counter")
+
+    async def cog_unload(self):
+        await self.scheduler.close()
+        await self.client.close()
+
+    def _cache_lookups(self) -> dict:
+        stats = self.cache.stats()
+        return {(("outcome", outcome),): stats[outcome] for outcome in ("memory_hits", "db_hits", "misses")}
 
     # ---------- Helper ----------
-    def translate_text(self, text: str, src: str, tgt: str) -> str:
-        model_name = HF_MODELS.get((src, tgt))
-        if model_name:
-            try:
-                response = requests.post(
-                    f"https://api-inference.huggingface.co/models/{model_name}",
-                    headers=HF_HEADERS,
-                    json={"inputs": text},
-                    timeout=30
-                )
-                if response.status_code == 200:
-                    result = response.json()
-                    if isinstance(result, list) and "translation_text" in result[0]:
-                        return result[0]["translation_text"]
-                return f"HF Translation failed ({response.status_code})"
-            except requests.exceptions.RequestException as e:
-                return f"HF request failed: {e}"
+    async def translate_text(self, text: str, src: str, tgt: str) -> str:
+        cached = await self.cache.get(text, src, tgt)
+        if cached is not None:
+            return cached
+        return await self._translate_and_store(text, src, tgt)
+
+    async def _translate_and_store(self, text: str, src: str, tgt: str) -> str:
         try:
-            translated = translator.translate(text, src=src, dest=tgt)
-            return translated.text
-        except Exception as e:
-            return f"Google Translate failed: {e}"
+            translated, provider = await self._translate_segments(text, src, tgt)
+        except ProviderError as e:
+            return str(e)
+        await self.cache.put(text, src, tgt, translated, provider)
+        return translated
+
+    async def _translate_segments(self, text: str, src: str, tgt: str) -> tuple[str, str | None]:
+        """
+        Long texts are split at line and sentence boundaries and the segments
+        translated concurrently (at most TRANSLATE_SEGMENT_CONCURRENCY at a
+        time), so latency follows the slowest segment, not the total length.
+        Segments are cached on their own, so an edited announcement only
+        re-translates what changed. Returns (translation, provider), where
+        provider is a fallback's name if any segment needed one.
+        """
+        segments = segment_text(text)
+        if len(segments) == 1:
+            return await self.client.translate_with_provider(text, src, tgt)
+        slots = asyncio.Semaphore(TRANSLATE_SEGMENT_CONCURRENCY)
+        fallbacks = set()
+
+        async def translate_segment(segment: str) -> str:
+            if not segment.strip():
+                return segment
+            cached = await self.cache.get(segment, src, tgt)
+            if cached is not None:
+                return cached
+            async with slots:
+                translated, provider = await self.client.translate_with_provider(segment, src, tgt)
+            if provider != provider_for(src, tgt):
+                fallbacks.add(provider)
+            await self.cache.put(segment, src, tgt, translated, provider)
+            return translated
+
+        translated = await asyncio.gather(*(translate_segment(segment.text) for segment in segments))
+        return join_segments(segments, translated), next(iter(fallbacks), None)
 
     # ---------- Admin Check ----------
     async def is_admin(self, interaction):
@@ -63,87 +117,200 @@ class TranslationCog(commands.Cog):
         if not await self.is_admin(interaction):
             await interaction.response.send_message("❌ Admins only.", ephemeral=True)
             return
-        session = SessionLocal()
-        try:
-            cid = str(interaction.channel.id)
-            existing = session.query(Channel).filter_by(channel_id=cid).first()
-            if existing:
-                await interaction.response.send_message("⚠️ Channel already configured.", ephemeral=True)
-                return
-            flags = []
-            for lang in (lang1.value, lang2.value):
-                if lang == "en": flags.append("🇺🇸")
-                elif lang == "pt": flags.append("🇵🇹")
-                elif lang == "uk": flags.append("🇺🇦")
-                elif lang == "ko": flags.append("🇰🇷")
-            channel_obj = Channel(
-                channel_id=cid,
-                lang1=lang1.value,
-                lang2=lang2.value,
-                flags=json.dumps(flags)
-            )
-            session.add(channel_obj)
-            session.commit()
-            await interaction.response.send_message(f"✅ Channel set as translator: {lang1.value} ↔ {lang2.value}", ephemeral=True)
-        finally:
-            session.close()
+        if channel_cache.get(interaction.channel.id):
+            await interaction.response.send_message("⚠️ Channel already configured.", ephemeral=True)
+            return
+        flags = []
+        for lang in (lang1.value, lang2.value):
+            if lang == "en": flags.append("🇺🇸")
+            elif lang == "pt": flags.append("🇵🇹")
+            elif lang == "uk": flags.append("🇺🇦")
+            elif lang == "ko": flags.append("🇰🇷")
+        config, created = await repo.add_channel(interaction.channel.id, lang1.value, lang2.value, flags)
+        channel_cache.put(config)
+        if not created:
+            await interaction.response.send_message("⚠️ Channel already configured.", ephemeral=True)
+            return
+        await interaction.response.send_message(f"✅ Channel set as translator: {lang1.value} ↔ {lang2.value}", ephemeral=True)
 
     @app_commands.command(name="removechannel", description="Remove channel from translator (Admin only)")
     async def removechannel(self, interaction):
         if not await self.is_admin(interaction):
             await interaction.response.send_message("❌ Admins only.", ephemeral=True)
             return
-        session = SessionLocal()
-        try:
-            cid = str(interaction.channel.id)
-            ch = session.query(Channel).filter_by(channel_id=cid).first()
-            if not ch:
-                await interaction.response.send_message("⚠️ Channel not configured.", ephemeral=True)
-                return
-            session.delete(ch)
-            session.commit()
-            await interaction.response.send_message("✅ Channel removed from translator mode.", ephemeral=True)
-        finally:
-            session.close()
+        removed = await repo.remove_channel(interaction.channel.id)
+        channel_cache.remove(interaction.channel.id)
+        if not removed:
+            await interaction.response.send_message("⚠️ Channel not configured.", ephemeral=True)
+            return
+        await interaction.response.send_message("✅ Channel removed from translator mode.", ephemeral=True)
 
     @app_commands.command(name="listchannels", description="List all configured translator channels")
     async def listchannels(self, interaction):
-        session = SessionLocal()
-        try:
-            channels = session.query(Channel).all()
-            if not channels:
-                await interaction.response.send_message("⚠️ No channels configured.", ephemeral=True)
-                return
-            table = "Channel | Lang1 | Lang2 | Flags\n"
-            table += "\n".join([f"<#{ch.channel_id}> | {ch.lang1} | {ch.lang2} | {', '.join(json.loads(ch.flags))}" for ch in channels])
-            embed = discord.Embed(title="Translator Channels", description=f"```{table}```", color=0x00ff00)
-            await interaction.response.send_message(embed=embed)
-        finally:
-            session.close()
+        channels = channel_cache.all_configs()
+        if not channels:
+            await interaction.response.send_message("⚠️ No channels configured.", ephemeral=True)
+            return
+        header = "Channel | Lang1 | Lang2 | Flags"
+        rows = "\n".join([f"<#{ch.channel_id}> | {ch.lang1} | {ch.lang2} | {', '.join(ch.flags)}" for ch in channels])
+        pages = split_long_message(rows)
+
+        async def fetch(cursor):
+            i = cursor or 0
+            lines = [header] + pages[i].rstrip("\n").split("\n")
+            return lines, i + 1 if i + 1 < len(pages) else None
+
+        view = PaginatedView("Translator Channels", fetch, color=0x00ff00, owner_id=interaction.user.id)
+        await view.start(interaction)
+
+    @app_commands.command(name="translationstats", description="Show translation cache, batching and scheduler statistics (Admin only)")
+    async def translationstats(self, interaction):
+        if not await self.is_admin(interaction):
+            await interaction.response.send_message("❌ Admins only.", ephemeral=True)
+            return
+        stats = self.cache.stats()
+        db_entries = await self.cache.db_entries()
+        lines = [
+            f"Memory hits: {stats['memory_hits']:,}",
+            f"DB hits: {stats['db_hits']:,}",
+            f"Misses: {stats['misses']:,}",
+            f"Hit ratio: {stats['hit_ratio']:.1%}",
+            f"Memory entries: {stats['memory_entries']:,}",
+            f"DB entries: {db_entries:,}",
+        ]
+        batch = self.client.batcher.stats()
+        lines += [
+            "",
+            f"HF batches: {batch['batches']:,} ({batch['items']:,} texts)",
+            f"Batch size: avg {batch['avg_batch_size']:.1f}, recent {batch['recent_avg_batch_size']:.1f}, max {batch['max_batch_size']}",
+            f"Queue wait: p50 {batch['queue_wait_p50'] * 1000:.0f} ms, max {batch['queue_wait_max'] * 1000:.0f} ms",
+        ]
+        sched = self.scheduler.stats()
+        lines += [
+            "",
+            f"Scheduler: {sched['queue_depth']:,} queued in {sched['queued_guilds']} guilds, {sched['in_flight']} in flight",
+            f"Dispatched {sched['dispatched']:,}, deduped {sched['deduped']:,}, merged {sched['merged']:,}, "
+            f"dropped {sched['dropped']:,}, expired {sched['expired']:,}",
+            f"Scheduler wait: p50 {sched['queue_wait_p50'] * 1000:.0f} ms, max {sched['queue_wait_max'] * 1000:.0f} ms",
+        ]
+        embed = discord.Embed(title="Translation Stats", description="```\n" + "\n".join(lines) + "\n```", color=0x00ff00)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
     # ---------- Event ----------
+    def _direction(self, ch, text: str) -> tuple[str, str]:
+        detected = self.detector.detect(text, ch.lang1, ch.lang2, channel_id=ch.channel_id)
+        return (ch.lang1, ch.lang2) if detected == ch.lang1 else (ch.lang2, ch.lang1)
+
+    @staticmethod
+    def _reply_chunks(src: str, tgt: str, translated: str) -> list[str]:
+        return split_long_message(f"🌐 Translation ({src} → {tgt}):\n{translated}")
+
     @commands.Cog.listener()
+    @metrics.timed(metrics.EVENT_SECONDS, metrics.EVENT_ERRORS, event="on_message")
     async def on_message(self, message):
         if message.author.bot:
             return
-        session = SessionLocal()
+        ch = channel_cache.get(message.channel.id)
+        if not ch: return
+        text = message.content.strip()
+        if not text: return
+        src, tgt = self._direction(ch, text)
+        # Cache hits are free; only misses queue for provider quota
+        translated = await self.cache.get(text, src, tgt)
+        if translated is None:
+            guild_id = message.guild.id if message.guild else 0
+            translated = await self.scheduler.submit(guild_id, message.channel.id, text, src, tgt)
+            if translated is None:
+                return  # dropped under load, or merged into an earlier reply
+        reply_ids = []
         try:
-            cid = str(message.channel.id)
-            ch = session.query(Channel).filter_by(channel_id=cid).first()
-            if not ch: return
-            text = message.content.strip()
-            if not text: return
-            try:
-                detected = detect(text)
-                if detected not in (ch.lang1, ch.lang2):
-                    detected = ch.lang1
-            except:
-                detected = ch.lang1
-            src, tgt = (ch.lang1, ch.lang2) if detected == ch.lang1 else (ch.lang2, ch.lang1)
-            translated = self.translate_text(text, src, tgt)
+            # Long translations go out as several replies; only the first pings
+            for i, chunk in enumerate(self._reply_chunks(src, tgt, translated)):
+                reply = await message.reply(chunk, mention_author=i == 0)
+                reply_ids.append(reply.id)
+        except discord.Forbidden:
+            pass
+        if reply_ids:
+            segments = [segment.text for segment in segment_text(text)]
+            self.replies.put(message.id, reply_ids, segment_hashes(segments, src, tgt))
+
+    # Raw events: they fire for every message, not just those still in
+    # discord.py's message cache, and the reply map has all we need
+    @commands.Cog.listener()
+    @metrics.timed(metrics.EVENT_SECONDS, metrics.EVENT_ERRORS, event="on_raw_message_edit")
+    async def on_raw_message_edit(self, payload):
+        entry = self.replies.get(payload.message_id)
+        if entry is None:
+            return
+        message = payload.message
+        ch = channel_cache.get(payload.channel_id)
+        if not ch:
+            self.replies.pop(payload.message_id)  # no longer a translator channel
+            return
+        text = message.content.strip()
+        if not text:
+            await self._delete_replies(message.channel, payload.message_id)
+            return
+        src, tgt = self._direction(ch, text)
+        hashes = segment_hashes([segment.text for segment in segment_text(text)], src, tgt)
+        if hashes == entry.hashes:
+            self.edit_events["unchanged"] += 1  # embeds resolving, pins, or no text change
+            return
+        # Unchanged segments are still in the translation cache, so only the
+        # changed ones reach the provider
+        translated = await self.cache.get(text, src, tgt)
+        if translated is None:
+            guild_id = payload.guild_id or 0
+            translated = await self.scheduler.submit(guild_id, payload.channel_id, text, src, tgt, mergeable=False)
+            if translated is None:
+                return  # dropped under load; the old translation stays
+        self.edit_events["retranslated"] += 1
+        self.edit_events["segments_changed"] += entry.changed_segments(hashes)
+        try:
+            reply_ids = await self._edit_replies(message, entry.reply_ids, self._reply_chunks(src, tgt, translated))
+        except discord.NotFound:
+            self.replies.pop(payload.message_id)  # replies deleted by a moderator
+            return
+        except discord.Forbidden:
+            return
+        self.replies.put(payload.message_id, reply_ids, hashes)
+
+    async def _edit_replies(self, message, reply_ids: tuple, chunks: list[str]) -> list[int]:
+        """
+        Edits the existing replies in place, replying again for extra chunks
+        and deleting replies no longer needed.
+        """
+        kept = []
+        for reply_id, chunk in zip(reply_ids, chunks):
+            await message.channel.get_partial_message(reply_id).edit(content=chunk)
+            kept.append(reply_id)
+        for chunk in chunks[len(reply_ids):]:
+            reply = await message.reply(chunk, mention_author=False)
+            kept.append(reply.id)
+        for reply_id in reply_ids[len(chunks):]:
+            await message.channel.get_partial_message(reply_id).delete()
+        return kept
+
+    @commands.Cog.listener()
+    @metrics.timed(metrics.EVENT_SECONDS, metrics.EVENT_ERRORS, event="on_raw_message_delete")
+    async def on_raw_message_delete(self, payload):
+        if self.replies.get(payload.message_id) is None:
+            return
+        # Partial, so uncached channels and threads still get their replies removed
+        channel = self.bot.get_partial_messageable(payload.channel_id)
+        await self._delete_replies(channel, payload.message_id)
+
+    async def _delete_replies(self, channel, message_id: int):
+        entry = self.replies.pop(message_id)
+        if entry is None:
+            return
+        self.edit_events["deleted"] += 1
+        for reply_id in entry.reply_ids:
             try:
-                await message.reply(f"🌐 Translation ({src} → {tgt}):\n{translated}")
-            except discord.Forbidden:
+                await channel.get_partial_message(reply_id).delete()
+            except (discord.NotFound, discord.Forbidden):
                 pass
-        finally:
-            session.close()
+
+
+async def setup(bot):
+    await bot.add_cog(TranslationCog(bot))
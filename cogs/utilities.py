@@ -1,24 +1,133 @@
 # ---------- FILE: cogs/utilities.py ----------
+import discord
 from discord.ext import commands
+from discord import app_commands
+import name_index
+from config import PAGE_VIEW_TIMEOUT
 
 # ---------- Utility Functions ----------
 def split_long_message(msg: str, limit: int = 1800):
     """
-    Splits long messages into chunks for Discord.
+    Splits long messages into chunks of at most `limit` characters for
+    Discord, at line breaks where possible, then at spaces, then anywhere.
+    Blank chunks (which Discord rejects) are never returned.
     """
-    lines = msg.split("\n")
     chunks = []
-    current = ""
-    for line in lines:
-        if len(current) + len(line) + 1 > limit:
-            chunks.append(current)
-            current = line + "\n"
-        else:
-            current += line + "\n"
-    if current:
+    current = None
+    for line in msg.split("\n"):
+        if current is not None and len(current) + 1 + len(line) <= limit:
+            current += "\n" + line
+            continue
+        if len(line) <= limit:
+            if current is not None:
+                chunks.append(current)
+            current = line
+            continue
+        # Longer than a whole chunk: fill what is left of this one, then cut at spaces
+        while len(line) > (limit if current is None else limit - len(current) - 1):
+            room = limit if current is None else limit - len(current) - 1
+            cut = line.rfind(" ", 0, room + 1)
+            if cut <= 0:
+                if current is not None:
+                    chunks.append(current)
+                    current = None
+                    continue
+                cut = limit
+            chunks.append(line[:cut] if current is None else f"{current}\n{line[:cut]}")
+            current = None
+            line = line[cut:].lstrip(" ")
+        current = line if current is None else f"{current}\n{line}"
+    if current is not None:
         chunks.append(current)
-    return chunks
+    return [chunk.strip("\n") for chunk in chunks if chunk.strip()]
+
+# ---------- Name Autocomplete ----------
+async def name_autocomplete(interaction, current: str) -> list[app_commands.Choice[str]]:
+    """
+    Tracked names matching what has been typed so far, from the in-memory
+    name index (no database query per keystroke).
+    """
+    return [app_commands.Choice(name=name, value=name) for name in name_index.complete(current) if len(name) <= 100]
+
+
+async def names_autocomplete(interaction, current: str) -> list[app_commands.Choice[str]]:
+    # Comma-separated lists: complete the last entry, keep the ones before it
+    head, _, last = current.rpartition(",")
+    head = f"{head}, " if head else ""
+    choices = []
+    for name in name_index.complete(last.strip()):
+        value = head + name
+        if len(value) <= 100:
+            choices.append(app_commands.Choice(name=value, value=value))
+    return choices
+
+
+# ---------- Paginated View ----------
+class PaginatedView(discord.ui.View):
+    """
+    Prev/Next buttons over pages fetched on demand.
+    `fetch(cursor)` returns (lines, next_cursor); the first page gets cursor
+    None and next_cursor None marks the last page. Fetched pages are kept for
+    the life of the view, so paging back and forth costs nothing.
+    """
+
+    def __init__(self, title: str, fetch, color: int = 0x8B0000, owner_id: int = None, timeout: float = PAGE_VIEW_TIMEOUT):
+        super().__init__(timeout=timeout)
+        self.title = title
+        self.fetch = fetch
+        self.color = color
+        self.owner_id = owner_id
+        self.page = 0
+        self.pages = {}  # page number -> (lines, next_cursor)
+        self.cursors = {0: None}  # page number -> cursor used to fetch it
+
+    async def load(self, page: int):
+        if page not in self.pages:
+            lines, next_cursor = await self.fetch(self.cursors[page])
+            self.pages[page] = (lines, next_cursor)
+            if next_cursor is not None:
+                self.cursors[page + 1] = next_cursor
+        self.page = page
+        self.previous_page.disabled = page == 0
+        self.next_page.disabled = page + 1 not in self.cursors
+
+    def embed(self) -> discord.Embed:
+        lines, _ = self.pages[self.page]
+        body = "\n".join(lines) if lines else "Nothing to show."
+        embed = discord.Embed(title=self.title, description=f"```\n{body}\n```", color=self.color)
+        embed.set_footer(text=f"Page {self.page + 1}")
+        return embed
+
+    async def start(self, interaction, ephemeral: bool = False):
+        await self.load(0)
+        if self.next_page.disabled:
+            # Single page: no buttons needed
+            await interaction.response.send_message(embed=self.embed(), ephemeral=ephemeral)
+            self.stop()
+            return
+        await interaction.response.send_message(embed=self.embed(), view=self, ephemeral=ephemeral)
+
+    async def interaction_check(self, interaction) -> bool:
+        return self.owner_id is None or interaction.user.id == self.owner_id
+
+    async def on_timeout(self):
+        self.pages.clear()
+
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        await self.load(self.page - 1)
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        await self.load(self.page + 1)
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
 
 class UtilitiesCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+
+
+async def setup(bot):
+    await bot.add_cog(UtilitiesCog(bot))
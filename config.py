@@ -16,3 +16,111 @@ HF_MODELS = {
 # ---------- Default Language Pair ----------
 DEFAULT_LANG_PAIR = ("en", "pt")  # English ↔ Portuguese
 DEFAULT_FLAGS = ["🇺🇸", "🇵🇹"]
+
+# ---------- Translation Providers ----------
+HF_API_URL = os.getenv("HF_API_URL", "https://api-inference.huggingface.co/models")
+HF_TIMEOUT = float(os.getenv("HF_TIMEOUT", "30"))  # seconds per request
+HF_CONCURRENCY = int(os.getenv("HF_CONCURRENCY", "4"))  # max in-flight HF requests
+GOOGLE_TIMEOUT = float(os.getenv("GOOGLE_TIMEOUT", "15"))
+GOOGLE_CONCURRENCY = int(os.getenv("GOOGLE_CONCURRENCY", "2"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "3"))  # consecutive failures before opening
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "60"))  # seconds a tripped provider is skipped
+
+# ---------- Translation Cache ----------
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "5000"))  # in-memory LRU entries
+TRANSLATION_CACHE_TTL = int(os.getenv("TRANSLATION_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+TRANSLATION_CACHE_DB_MAX = int(os.getenv("TRANSLATION_CACHE_DB_MAX", "100000"))  # persistent rows
+
+# ---------- Translation Batching ----------
+HF_BATCH_WINDOW = float(os.getenv("HF_BATCH_WINDOW", "0.05"))  # seconds to collect a batch
+HF_BATCH_MAX = int(os.getenv("HF_BATCH_MAX", "16"))  # max texts per HF request
+
+# ---------- Translation Scheduling ----------
+# Token buckets are (translations per second, burst size)
+TRANSLATE_GLOBAL_RATE = float(os.getenv("TRANSLATE_GLOBAL_RATE", "10"))  # shared provider quota
+TRANSLATE_GLOBAL_BURST = int(os.getenv("TRANSLATE_GLOBAL_BURST", "20"))
+TRANSLATE_GUILD_RATE = float(os.getenv("TRANSLATE_GUILD_RATE", "3"))
+TRANSLATE_GUILD_BURST = int(os.getenv("TRANSLATE_GUILD_BURST", "10"))
+TRANSLATE_CHANNEL_RATE = float(os.getenv("TRANSLATE_CHANNEL_RATE", "1"))
+TRANSLATE_CHANNEL_BURST = int(os.getenv("TRANSLATE_CHANNEL_BURST", "5"))
+TRANSLATE_QUEUE_MAX = int(os.getenv("TRANSLATE_QUEUE_MAX", "20"))  # queued messages per channel
+TRANSLATE_OVERFLOW = os.getenv("TRANSLATE_OVERFLOW", "merge")  # "drop" or "merge" when a channel queue is full
+TRANSLATE_MAX_WAIT = float(os.getenv("TRANSLATE_MAX_WAIT", "60"))  # seconds before a queued message is abandoned
+TRANSLATE_MAX_INFLIGHT = int(os.getenv("TRANSLATE_MAX_INFLIGHT", "16"))
+
+# ---------- Long Messages ----------
+TRANSLATE_SEGMENT_CHARS = int(os.getenv("TRANSLATE_SEGMENT_CHARS", "400"))  # max chars per provider call (opus-mt truncates ~512 tokens)
+TRANSLATE_SEGMENT_CONCURRENCY = int(os.getenv("TRANSLATE_SEGMENT_CONCURRENCY", "4"))  # segments of one message in flight
+
+# ---------- Edited Messages ----------
+REPLY_MAP_MAX_AGE = float(os.getenv("REPLY_MAP_MAX_AGE", str(24 * 3600)))  # seconds edits/deletes still update the translation
+REPLY_MAP_SIZE = int(os.getenv("REPLY_MAP_SIZE", "50000"))  # translated messages remembered
+
+# ---------- Database ----------
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///bot_data.db")  # queries are written for SQLite
+
+# ---------- SQLite Tuning ----------
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # bytes
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negative = KiB (64 MiB)
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # ms to wait on a locked database
+
+# ---------- Charts ----------
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "2"))  # threads rendering charts off the event loop
+CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", "16"))  # rendered PNGs kept in memory
+
+# ---------- Pagination ----------
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "25"))  # rows per leaderboard page
+PAGE_VIEW_TIMEOUT = float(os.getenv("PAGE_VIEW_TIMEOUT", "180"))  # seconds a page view (and its cache) lives
+
+# ---------- Exports ----------
+EXPORT_PART_LIMIT = int(os.getenv("EXPORT_PART_LIMIT", str(8 * 1024 * 1024)))  # bytes per attachment
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "1000"))  # rows fetched/written per batch
+
+# ---------- Maintenance ----------
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "90"))  # raw ScoreHistory kept this long
+MAINTENANCE_INTERVAL_HOURS = float(os.getenv("MAINTENANCE_INTERVAL_HOURS", "24"))
+VACUUM_PAGES = int(os.getenv("VACUUM_PAGES", "2000"))  # free pages released per incremental vacuum run
+
+# ---------- Diagnostics ----------
+LOOP_STALL_THRESHOLD = float(os.getenv("LOOP_STALL_THRESHOLD", "0.25"))  # seconds the loop may block before its stack is logged
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.05"))  # heartbeat period, seconds
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "60"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))  # seconds between stack samples
+
+# ---------- Startup ----------
+COMMAND_HASH_FILE = os.getenv("COMMAND_HASH_FILE", ".command_tree.hash")  # last synced command tree hash
+
+# ---------- Web Server ----------
+WEB_HOST = os.getenv("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(os.getenv("PORT", "5000"))  # PORT is what Heroku-style hosts assign
+WEB_CACHE_SIZE = int(os.getenv("WEB_CACHE_SIZE", "256"))  # rendered API responses kept in memory
+WEB_MAX_AGE = int(os.getenv("WEB_MAX_AGE", "5"))  # Cache-Control max-age for API responses, seconds
+
+# ---------- Sharding ----------
+def _shard_ids(value: str | None) -> list[int] | None:
+    """
+    "0-3,8" -> [0, 1, 2, 3, 8]; unset -> None (this process runs every shard).
+    """
+    if not value:
+        return None
+    ids = []
+    for part in value.split(","):
+        low, _, high = part.strip().partition("-")
+        ids.extend(range(int(low), int(high or low) + 1))
+    return ids
+
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None  # None = Discord's recommendation
+SHARD_IDS = _shard_ids(os.getenv("SHARD_IDS"))  # shards owned by this process; needs SHARD_COUNT
+# The primary process syncs commands and runs history maintenance
+PRIMARY_PROCESS = SHARD_IDS is None or 0 in SHARD_IDS
+# Only the primary binds PORT by default, so processes on one host don't clash;
+# set WEB_ENABLED=1 (with its own PORT) to serve /metrics from another process too
+WEB_ENABLED = os.getenv("WEB_ENABLED", "1" if PRIMARY_PROCESS else "0") == "1"
+
+# ---------- Cross-process Cache Invalidation ----------
+CHANGE_POLL_INTERVAL = float(os.getenv("CHANGE_POLL_INTERVAL", "1"))  # seconds between change-log polls
+CHANGE_LOG_RETENTION = int(os.getenv("CHANGE_LOG_RETENTION", "3600"))  # seconds change rows are kept
+
+# ---------- Name Matching ----------
+NAME_SUGGEST_THRESHOLD = float(os.getenv("NAME_SUGGEST_THRESHOLD", "0.7"))  # trigram similarity for "did you mean"
+NAME_CANDIDATE_BUDGET = int(os.getenv("NAME_CANDIDATE_BUDGET", "5000"))  # names scanned per fuzzy lookup
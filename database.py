@@ -1,12 +1,27 @@
 # ---------- FILE: database.py ----------
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import create_engine, event, Column, Integer, String, Text, Date, DateTime, ForeignKey, Index
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 import datetime
+from config import DATABASE_URL, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE, SQLITE_BUSY_TIMEOUT
 
-# ---------- SQLite Database Setup ----------
-DATABASE_URL = "sqlite:///bot_data.db"
+# ---------- Database Setup ----------
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+engine = create_engine(DATABASE_URL, echo=False, connect_args={"check_same_thread": False} if IS_SQLITE else {})
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not IS_SQLITE:
+        return
+    # WAL lets readers (and other bot processes) run alongside the writer; NORMAL sync is safe with WAL
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}")  # first, so the pragmas below wait on locks too
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    cursor.close()
 
-engine = create_engine(DATABASE_URL, echo=False, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -36,3 +51,40 @@ class ScoreHistory(Base):
     value = Column(Integer)
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
     name = relationship("Name", back_populates="history")
+    __table_args__ = (
+        Index("ix_score_history_name_category_timestamp", "name_id", "category", "timestamp"),
+    )
+
+class ScoreHistoryDaily(Base):
+    __tablename__ = "score_history_daily"
+    # Highest value per name, category and day for raw history past the retention window
+    name_id = Column(Integer, ForeignKey("names.id"), primary_key=True)
+    category = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    value = Column(Integer, nullable=False)
+
+class TranslationCacheEntry(Base):
+    __tablename__ = "translation_cache"
+    key = Column(String, primary_key=True)  # hash of provider, src, tgt and normalized text
+    provider = Column(String, nullable=False)  # HF model name or "google"
+    src = Column(String, nullable=False)
+    tgt = Column(String, nullable=False)
+    translation = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    last_used = Column(DateTime, default=datetime.datetime.utcnow)
+    __table_args__ = (
+        Index("ix_translation_cache_created_at", "created_at"),
+        Index("ix_translation_cache_last_used", "last_used"),
+    )
+
+class CacheChange(Base):
+    __tablename__ = "cache_changes"
+    # AUTOINCREMENT: pollers track the last id they saw, so ids must never be
+    # reused after the log is pruned empty
+    __table_args__ = {"sqlite_autoincrement": True}
+    # Append-only log other bot processes poll to invalidate their in-memory caches
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    origin = Column(String, nullable=False)  # writing process, so it can skip its own changes
+    scope = Column(String, nullable=False)  # "channel", "name", "name_removed" or "scores"
+    key = Column(String, nullable=False, default="")
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
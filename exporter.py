@@ -0,0 +1,217 @@
+# ---------- FILE: exporter.py ----------
+import csv
+import gzip
+import io
+import os
+
+from sqlalchemy import select
+
+from database import Name, ScoreHistory
+from leaderboard import ScoreDiff, score_diffs_stmt
+from config import EXPORT_PART_LIMIT, EXPORT_BATCH_ROWS
+
+FORMATS = ("csv", "csv.gz", "xlsx", "parquet")
+
+
+class ExportError(Exception):
+    """
+    Raised when an export cannot be produced (e.g. a missing optional library).
+    """
+
+
+# ---------- Row Sources (stream from a server-side cursor) ----------
+def score_rows(session, category: str, showdiff: bool):
+    stmt = score_diffs_stmt(category, ranked=False).execution_options(yield_per=EXPORT_BATCH_ROWS)
+    for row in session.execute(stmt):
+        d = ScoreDiff(*row)
+        yield (d.name, d.history_delta if showdiff else d.current)
+
+
+def history_rows(session, category: str | None = None):
+    stmt = (
+        select(Name.name, ScoreHistory.category, ScoreHistory.value, ScoreHistory.timestamp)
+        .join(Name, Name.id == ScoreHistory.name_id)
+        .order_by(ScoreHistory.name_id, ScoreHistory.timestamp)
+        .execution_options(yield_per=EXPORT_BATCH_ROWS)
+    )
+    if category:
+        stmt = stmt.where(ScoreHistory.category == category)
+    for name, cat, value, timestamp in session.execute(stmt):
+        yield (name, cat, value, timestamp.isoformat(sep=" ", timespec="seconds") if timestamp else "")
+
+
+# ---------- Incremental Writers ----------
+class _Writer:
+    """
+    Writes one part file. `size()` is the bytes written so far for CSV/gzip;
+    xlsx and Parquet only know theirs on close, so they report the
+    uncompressed CSV-equivalent size, which over-estimates their output.
+    """
+
+    def __init__(self, path: str, header: list):
+        self.path = path
+        self.header = header
+        self.rows = 0
+        self._estimate = 0
+
+    def write(self, row):
+        self.rows += 1
+        self._estimate += sum(len(str(v)) + 1 for v in row)
+
+    def size(self) -> int:
+        return self._estimate
+
+    def close(self):
+        pass
+
+
+class CsvWriter(_Writer):
+    def __init__(self, path, header):
+        super().__init__(path, header)
+        self._raw = open(path, "wb")
+        self._text = io.TextIOWrapper(self._raw, encoding="utf-8", newline="")
+        self._csv = csv.writer(self._text)
+        self._csv.writerow(header)
+
+    def write(self, row):
+        self.rows += 1
+        self._csv.writerow(row)
+
+    def size(self):
+        # Bytes handed to the OS so far; the text layer buffers at most a few KiB more
+        return self._raw.tell()
+
+    def close(self):
+        self._text.close()
+
+
+class GzipCsvWriter(_Writer):
+    def __init__(self, path, header):
+        super().__init__(path, header)
+        self._raw = open(path, "wb")
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        self._text = io.TextIOWrapper(self._gzip, encoding="utf-8", newline="")
+        self._csv = csv.writer(self._text)
+        self._csv.writerow(header)
+
+    def write(self, row):
+        self.rows += 1
+        self._csv.writerow(row)
+
+    def size(self):
+        # Compressed bytes flushed so far; the compressor holds back at most a small window
+        return self._raw.tell()
+
+    def close(self):
+        self._text.close()
+        self._raw.close()  # GzipFile leaves a passed-in fileobj open
+
+
+class XlsxWriter(_Writer):
+    def __init__(self, path, header):
+        super().__init__(path, header)
+        from openpyxl import Workbook
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        self._sheet.append(header)
+
+    def write(self, row):
+        super().write(row)
+        self._sheet.append(list(row))
+
+    def close(self):
+        self._workbook.save(self.path)
+
+
+class ParquetWriter(_Writer):
+    def __init__(self, path, header):
+        super().__init__(path, header)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ExportError("Parquet export needs the optional `pyarrow` package.") from e
+        self._pa = pyarrow
+        self._writer = None
+        self._batch = []
+
+    def write(self, row):
+        super().write(row)
+        self._batch.append(row)
+        if len(self._batch) >= EXPORT_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if not self._batch:
+            return
+        columns = list(zip(*self._batch))
+        table = self._pa.table({name: list(col) for name, col in zip(self.header, columns)})
+        if self._writer is None:
+            self._writer = self._pa.parquet.ParquetWriter(self.path, table.schema, compression="zstd")
+        self._writer.write_table(table)
+        self._batch = []
+
+    def close(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+        else:
+            self._pa.parquet.write_table(self._pa.table({name: [] for name in self.header}), self.path)
+
+
+WRITERS = {
+    "csv": CsvWriter,
+    "csv.gz": GzipCsvWriter,
+    "xlsx": XlsxWriter,
+    "parquet": ParquetWriter,
+}
+
+
+# ---------- Engine ----------
+def write_parts(rows, header: list, fmt: str, directory: str, basename: str,
+                part_limit: int = EXPORT_PART_LIMIT) -> list[str]:
+    """
+    Streams `rows` into one or more files of format `fmt` in `directory`,
+    starting a new part whenever the current one reaches `part_limit` bytes.
+    Returns the part paths; nothing but the current batch is held in memory.
+    """
+    if fmt not in WRITERS:
+        raise ExportError(f"Unknown export format: {fmt}")
+    # Leave headroom for the last row and container overhead
+    threshold = int(part_limit * 0.9)
+    paths = []
+    writer = None
+    for row in rows:
+        if writer is None:
+            suffix = f".part{len(paths) + 1}" if paths else ""
+            writer = WRITERS[fmt](os.path.join(directory, f"{basename}{suffix}.{fmt}"), header)
+        writer.write(row)
+        if writer.size() >= threshold:
+            writer.close()
+            paths.append(writer.path)
+            writer = None
+    if writer is not None or not paths:
+        if writer is None:
+            writer = WRITERS[fmt](os.path.join(directory, f"{basename}.{fmt}"), header)
+        writer.close()
+        paths.append(writer.path)
+    if len(paths) > 1 and not paths[0].endswith(f".part1.{fmt}"):
+        # Name the first part consistently once we know there are several
+        first = os.path.join(directory, f"{basename}.part1.{fmt}")
+        os.replace(paths[0], first)
+        paths[0] = first
+    return paths
+
+
+def export_scores(session, category: str, showdiff: bool, fmt: str, directory: str,
+                  part_limit: int = EXPORT_PART_LIMIT) -> list[str]:
+    header = ["Name", "Δ"] if showdiff else ["Name", "Score"]
+    return write_parts(score_rows(session, category, showdiff), header, fmt, directory, f"{category}_scores",
+                       part_limit)
+
+
+def export_history(session, category: str | None, fmt: str, directory: str,
+                   part_limit: int = EXPORT_PART_LIMIT) -> list[str]:
+    header = ["Name", "Category", "Value", "Timestamp"]
+    basename = f"{category}_history" if category else "score_history"
+    return write_parts(history_rows(session, category), header, fmt, directory, basename, part_limit)
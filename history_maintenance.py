@@ -0,0 +1,101 @@
+# ---------- FILE: history_maintenance.py ----------
+import datetime
+import logging
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+from config import HISTORY_RETENTION_DAYS, VACUUM_PAGES
+
+log = logging.getLogger(__name__)
+
+# Raw history rows eligible for compaction: older than the cutoff, and not
+# one of the two newest rows per (name, category), which score diffs need.
+_COMPACTABLE = """
+    SELECT id, name_id, category, timestamp, value
+    FROM (
+        SELECT id, name_id, category, timestamp, value,
+               ROW_NUMBER() OVER (PARTITION BY name_id, category
+                                  ORDER BY timestamp DESC, id DESC) AS rn
+        FROM score_history
+    )
+    WHERE timestamp < :cutoff AND rn > 2
+"""
+
+
+@dataclass
+class MaintenanceReport:
+    orphans_deleted: int = 0
+    rows_compacted: int = 0
+    rollup_rows: int = 0
+    bytes_reclaimed: int = 0
+    seconds: float = 0.0
+
+
+def _db_bytes(conn) -> int:
+    page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+    return conn.exec_driver_sql("PRAGMA page_count").scalar() * page_size
+
+
+def delete_orphans(session) -> int:
+    result = session.execute(text(
+        "DELETE FROM score_history WHERE name_id IS NULL OR name_id NOT IN (SELECT id FROM names)"
+    ))
+    session.execute(text("DELETE FROM score_history_daily WHERE name_id NOT IN (SELECT id FROM names)"))
+    return result.rowcount
+
+
+def compact_history(session, retention_days: int = HISTORY_RETENTION_DAYS) -> tuple[int, int]:
+    """
+    Rolls raw history older than the retention window into score_history_daily
+    (highest value per day, matching history_series) and deletes the raw
+    rows. Returns (rows deleted, rollup rows written). A day compacted over
+    two runs merges into the same rollup row, keeping the larger value.
+    """
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=retention_days)
+    rollup = session.execute(text(f"""
+        INSERT INTO score_history_daily (name_id, category, day, value)
+        SELECT name_id, category, date(timestamp), MAX(value) FROM ({_COMPACTABLE})
+        GROUP BY name_id, category, date(timestamp)
+        ON CONFLICT (name_id, category, day) DO UPDATE SET value = MAX(value, excluded.value)
+    """), {"cutoff": cutoff})
+    deleted = session.execute(text(f"DELETE FROM score_history WHERE id IN (SELECT id FROM ({_COMPACTABLE}))"), {"cutoff": cutoff})
+    return deleted.rowcount, rollup.rowcount
+
+
+def incremental_vacuum(connection, pages: int = VACUUM_PAGES):
+    """
+    Switches the file to incremental auto-vacuum the first time (needs one
+    full VACUUM), then releases up to `pages` free pages per call.
+    The full VACUUM rewrites the whole file on the DB thread: every query
+    waits for it, and other processes may hit their busy timeout.
+    """
+    conn = connection.execution_options(isolation_level="AUTOCOMMIT")
+    if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+        size = _db_bytes(conn)
+        log.warning("Switching to incremental auto-vacuum: one-time full VACUUM of %.1f MiB, "
+                    "database calls are blocked until it finishes", size / 1024 / 1024)
+        started = time.perf_counter()
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+        log.warning("One-time full VACUUM finished in %.1fs", time.perf_counter() - started)
+    conn.exec_driver_sql(f"PRAGMA incremental_vacuum({pages})")
+
+
+def run_maintenance(session, retention_days: int = HISTORY_RETENTION_DAYS) -> MaintenanceReport:
+    started = datetime.datetime.utcnow()
+    report = MaintenanceReport()
+    size_before = _db_bytes(session.connection())
+    try:
+        report.orphans_deleted = delete_orphans(session)
+        report.rows_compacted, report.rollup_rows = compact_history(session, retention_days)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    with session.bind.connect() as conn:
+        incremental_vacuum(conn)
+        report.bytes_reclaimed = max(size_before - _db_bytes(conn), 0)
+    report.seconds = (datetime.datetime.utcnow() - started).total_seconds()
+    return report
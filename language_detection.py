@@ -0,0 +1,112 @@
+# ---------- FILE: language_detection.py ----------
+import functools
+import os
+from collections import OrderedDict
+
+from langdetect import DetectorFactory, LangDetectException
+from langdetect.detector_factory import PROFILES_DIRECTORY
+
+# Script each supported language is written in
+LANG_SCRIPTS = {
+    "en": "latin",
+    "pt": "latin",
+    "uk": "cyrillic",
+    "ko": "hangul",
+}
+
+# Letters that only show up in Portuguese out of the Latin-script languages we support
+PT_MARKERS = frozenset("ãõçáéíóúâêôàÃÕÇÁÉÍÓÚÂÊÔÀ")
+
+
+def _script_of(ch: str) -> str | None:
+    code = ord(ch)
+    if code < 128:
+        return "latin" if ch.isalpha() else None
+    if 0xAC00 <= code <= 0xD7A3 or 0x1100 <= code <= 0x11FF or 0x3130 <= code <= 0x318F:
+        return "hangul"
+    if 0x0400 <= code <= 0x04FF:
+        return "cyrillic"
+    if 0x00C0 <= code <= 0x024F:
+        return "latin"
+    return None
+
+
+def script_counts(text: str) -> dict:
+    counts = {}
+    for ch in text:
+        script = _script_of(ch)
+        if script:
+            counts[script] = counts.get(script, 0) + 1
+    return counts
+
+
+@functools.lru_cache(maxsize=None)
+def _pair_factory(lang1: str, lang2: str) -> DetectorFactory:
+    """
+    A seeded langdetect factory that only knows the channel's two languages,
+    so results are deterministic and scoring skips every other profile.
+    """
+    profiles = []
+    for lang in sorted({lang1, lang2}):
+        with open(os.path.join(PROFILES_DIRECTORY, lang), encoding="utf-8") as f:
+            profiles.append(f.read())
+    factory = DetectorFactory()
+    factory.load_json_profile(profiles)
+    factory.set_seed(0)
+    return factory
+
+
+class LanguageDetector:
+    """
+    Decides which of a channel's two languages a message is written in.
+    Unicode script checks settle most messages; only same-script pairs
+    (en/pt) fall back to the restricted langdetect factory.
+    """
+
+    SHORT_MESSAGE = 32  # messages up to this length are memoized per channel
+
+    def __init__(self, memo_size: int = 4096):
+        self.memo_size = memo_size
+        self._memo = OrderedDict()  # (channel_id, text) -> lang
+
+    def detect(self, text: str, lang1: str, lang2: str, channel_id=None) -> str:
+        if len(text) > self.SHORT_MESSAGE or channel_id is None:
+            return self._detect(text, lang1, lang2)
+        key = (channel_id, text)
+        lang = self._memo.get(key)
+        if lang is not None:
+            self._memo.move_to_end(key)
+            return lang
+        lang = self._detect(text, lang1, lang2)
+        self._memo[key] = lang
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return lang
+
+    def _detect(self, text: str, lang1: str, lang2: str) -> str:
+        if lang1 == lang2:
+            return lang1
+        script1, script2 = LANG_SCRIPTS.get(lang1), LANG_SCRIPTS.get(lang2)
+        counts = script_counts(text)
+        if not counts:
+            return lang1
+        if script1 != script2:
+            if "latin" in (script1, script2):
+                # Any Hangul or Cyrillic means that language: Korean or Ukrainian
+                # text often carries English words, the other way round rarely
+                lang, script, other = (lang2, script2, lang1) if script1 == "latin" else (lang1, script1, lang2)
+                return lang if counts.get(script) else other
+            # Pick the language whose script has the most letters
+            return lang1 if counts.get(script1, 0) >= counts.get(script2, 0) else lang2
+        if {lang1, lang2} == {"en", "pt"} and any(ch in PT_MARKERS for ch in text):
+            return "pt"
+        return self._fallback(text, lang1, lang2)
+
+    def _fallback(self, text: str, lang1: str, lang2: str) -> str:
+        try:
+            detector = _pair_factory(lang1, lang2).create()
+            detector.append(text)
+            detected = detector.detect()
+        except (LangDetectException, OSError):
+            return lang1
+        return detected if detected in (lang1, lang2) else lang1
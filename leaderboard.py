@@ -0,0 +1,115 @@
+# ---------- FILE: leaderboard.py ----------
+from dataclasses import dataclass
+
+from sqlalchemy import select, func, case, and_, or_, literal_column
+
+from database import Name, ScoreHistory
+
+
+def score_column(category: str):
+    return Name.kill_score if category == "kill" else Name.vs_score
+
+
+def ranked_score(category: str):
+    # Rendered as coalesce(col, 0) with a literal so SQLite can use the
+    # matching expression index created in migrations.py
+    return func.coalesce(score_column(category), literal_column("0"))
+
+
+# ---------- Score Diff ----------
+@dataclass(frozen=True)
+class ScoreDiff:
+    name_id: int
+    name: str
+    current: int  # value on the Name row
+    latest: int | None  # most recent ScoreHistory value
+    previous: int | None  # ScoreHistory value before that
+
+    @property
+    def delta(self) -> int:
+        """Current score minus the previous recorded value (leaderboard diff)."""
+        return self.current - (self.previous or 0)
+
+    @property
+    def history_delta(self) -> int:
+        """Latest minus previous recorded value; the latest value alone when only one exists."""
+        if self.latest is not None and self.previous is not None:
+            return self.latest - self.previous
+        return self.latest or 0
+
+
+def score_diffs_stmt(category: str, ranked: bool = True):
+    """
+    Current, latest and previous values for every name in one query.
+    ROW_NUMBER over (name_id, category) picks the two newest history rows.
+    Sorted by score (ties by id) when `ranked`, otherwise by id.
+    """
+    ranked_history = (
+        select(
+            ScoreHistory.name_id,
+            ScoreHistory.value,
+            func.row_number().over(
+                partition_by=(ScoreHistory.name_id, ScoreHistory.category),
+                order_by=(ScoreHistory.timestamp.desc(), ScoreHistory.id.desc())
+            ).label("rn")
+        )
+        .where(ScoreHistory.category == category)
+        .subquery()
+    )
+    current = func.coalesce(score_column(category), 0).label("current")
+    stmt = (
+        select(
+            Name.id,
+            Name.name,
+            current,
+            func.max(case((ranked_history.c.rn == 1, ranked_history.c.value))).label("latest"),
+            func.max(case((ranked_history.c.rn == 2, ranked_history.c.value))).label("previous"),
+        )
+        .outerjoin(ranked_history, and_(ranked_history.c.name_id == Name.id, ranked_history.c.rn <= 2))
+        .group_by(Name.id)
+    )
+    return stmt.order_by(current.desc(), Name.id) if ranked else stmt.order_by(Name.id)
+
+
+def score_diffs(session, category: str, ranked: bool = True) -> list[ScoreDiff]:
+    return [ScoreDiff(*row) for row in session.execute(score_diffs_stmt(category, ranked))]
+
+
+def score_page(session, category: str, after: tuple | None = None, limit: int = 25) -> list[ScoreDiff]:
+    """
+    One leaderboard page in score order using keyset pagination: `after` is
+    the (score, id) of the last row on the previous page. History is only
+    ranked for the names on the page.
+    """
+    score = ranked_score(category)
+    page = select(Name.id, Name.name, score.label("current"))
+    if after is not None:
+        last_score, last_id = after
+        page = page.where(or_(score < last_score, and_(score == last_score, Name.id > last_id)))
+    page = page.order_by(score.desc(), Name.id).limit(limit).cte("page")
+
+    ranked_history = (
+        select(
+            ScoreHistory.name_id,
+            ScoreHistory.value,
+            func.row_number().over(
+                partition_by=ScoreHistory.name_id,
+                order_by=(ScoreHistory.timestamp.desc(), ScoreHistory.id.desc())
+            ).label("rn")
+        )
+        .where(ScoreHistory.category == category, ScoreHistory.name_id.in_(select(page.c.id)))
+        .subquery()
+    )
+    stmt = (
+        select(
+            page.c.id,
+            page.c.name,
+            page.c.current,
+            func.max(case((ranked_history.c.rn == 1, ranked_history.c.value))).label("latest"),
+            func.max(case((ranked_history.c.rn == 2, ranked_history.c.value))).label("previous"),
+        )
+        .outerjoin(ranked_history, and_(ranked_history.c.name_id == page.c.id, ranked_history.c.rn <= 2))
+        .group_by(page.c.id, page.c.name, page.c.current)
+        .order_by(page.c.current.desc(), page.c.id)
+    )
+    return [ScoreDiff(*row) for row in session.execute(stmt)]
@@ -0,0 +1,131 @@
+# ---------- FILE: leaderboard_index.py ----------
+from bisect import bisect_left, insort
+
+from sqlalchemy import select, func
+
+from database import SessionLocal, Name
+import name_index
+from name_index import NameIndex
+
+CATEGORIES = ("kill", "vs")
+
+
+# ---------- Ranked Index ----------
+class RankedIndex:
+    """
+    Names ordered by score (highest first, ties by id, like score_diffs).
+    Lookups are bisect searches; updates are a bisect plus a list
+    insert/delete, which is a fast memmove even for tens of thousands of names.
+    """
+
+    def __init__(self):
+        self._keys = []  # sorted (-score, name_id, name)
+        self._by_name = {}  # name -> (-score, name_id, name)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def names(self):
+        return self._by_name.keys()
+
+    def update(self, name_id: int, name: str, score: int):
+        old = self._by_name.get(name)
+        if old is not None:
+            del self._keys[bisect_left(self._keys, old)]
+        key = (-(score or 0), name_id, name)
+        insort(self._keys, key)
+        self._by_name[name] = key
+
+    def remove(self, name: str) -> bool:
+        key = self._by_name.pop(name, None)
+        if key is None:
+            return False
+        del self._keys[bisect_left(self._keys, key)]
+        return True
+
+    def top(self, n: int, offset: int = 0) -> list[tuple]:
+        """
+        (rank, name, score) for ranks offset+1 .. offset+n.
+        """
+        return [(offset + i + 1, name, -neg) for i, (neg, _, name) in enumerate(self._keys[offset:offset + n])]
+
+    def rank_of(self, name: str) -> tuple | None:
+        """
+        (rank, score) or None when the name is not tracked.
+        """
+        key = self._by_name.get(name)
+        if key is None:
+            return None
+        return bisect_left(self._keys, key) + 1, -key[0]
+
+    def neighbours(self, name: str, radius: int = 2) -> list[tuple]:
+        found = self.rank_of(name)
+        if found is None:
+            return []
+        start = max(found[0] - 1 - radius, 0)
+        return self.top(found[0] - start + radius, offset=start)
+
+
+# ---------- Process-wide Index ----------
+_indexes = {category: RankedIndex() for category in CATEGORIES}
+
+
+def build(session) -> dict[str, RankedIndex]:
+    """
+    Fresh indexes for both categories from the names table.
+    """
+    rows = session.execute(select(
+        Name.id, Name.name, func.coalesce(Name.kill_score, 0), func.coalesce(Name.vs_score, 0)
+    )).all()
+    indexes = {}
+    for category, column in (("kill", 2), ("vs", 3)):
+        index = RankedIndex()
+        index._keys = sorted((-row[column], row[0], row[1]) for row in rows)
+        index._by_name = {key[2]: key for key in index._keys}
+        indexes[category] = index
+    return indexes
+
+
+def install(indexes: dict[str, RankedIndex], names: NameIndex | None = None):
+    # One assignment per category, so readers never see a half-built index.
+    # Pass `names` when it was built off the event loop (it takes a while).
+    _indexes.update(indexes)
+    name_index.install(names if names is not None else NameIndex(indexes["kill"].names()))
+
+
+def load(session=None) -> int:
+    """
+    (Re)build both category indexes from the names table.
+    """
+    own_session = session is None
+    session = session or SessionLocal()
+    try:
+        indexes = build(session)
+    finally:
+        if own_session:
+            session.close()
+    install(indexes, NameIndex(indexes["kill"].names()))
+    return len(indexes["kill"])
+
+
+def get(category: str) -> RankedIndex:
+    return _indexes[category]
+
+
+def update(category: str, name_id: int, name: str, score: int):
+    _indexes[category].update(name_id, name, score)
+    name_index.add(name)
+
+
+def add_name(name_id: int, name: str):
+    # A new name shows up in both categories, unset scores ranking as 0
+    for index in _indexes.values():
+        if index.rank_of(name) is None:
+            index.update(name_id, name, 0)
+    name_index.add(name)
+
+
+def remove(name: str):
+    for index in _indexes.values():
+        index.remove(name)
+    name_index.remove(name)
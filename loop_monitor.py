@@ -0,0 +1,140 @@
+# ---------- FILE: loop_monitor.py ----------
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from dataclasses import dataclass
+
+from metrics import registry
+from config import LOOP_STALL_THRESHOLD, LOOP_MONITOR_INTERVAL, PROFILE_SAMPLE_INTERVAL
+
+log = logging.getLogger(__name__)
+
+LOOP_LAG = registry.histogram(
+    "event_loop_lag_seconds", "How late the loop heartbeat woke up",
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+LOOP_STALLS = registry.counter("event_loop_stalls_total", "Loop blocks longer than the stall threshold")
+
+
+@dataclass
+class Stall:
+    started: float
+    stack: str
+    duration: float | None = None  # None while the loop is still blocked
+
+
+# ---------- Stall Watchdog ----------
+class LoopMonitor:
+    """
+    A heartbeat task on the loop records how late each wake-up is. A
+    watchdog thread checks the heartbeat and, once it is `threshold` seconds
+    overdue, grabs the loop thread's stack: whatever is on it is the code
+    blocking the loop.
+    """
+
+    def __init__(self, threshold: float = LOOP_STALL_THRESHOLD, interval: float = LOOP_MONITOR_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = deque(maxlen=20)
+        self.loop_thread_id = None
+        self._last_beat = time.monotonic()
+        self._current = None
+        self._task = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Must be called from the event loop thread.
+        """
+        if self._task is not None:
+            return
+        self.loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+            self._last_beat = now
+            LOOP_LAG.observe(lag)
+            stall = self._current
+            if stall is not None:
+                self._current = None
+                stall.duration = lag
+                log.warning("Event loop was blocked for %.3fs", lag)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            blocked_for = time.monotonic() - self._last_beat
+            if blocked_for < self.threshold or self._current is not None:
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "<no frame>"
+            stall = Stall(started=time.time() - blocked_for, stack=stack)
+            self._current = stall
+            self.stalls.append(stall)
+            LOOP_STALLS.inc()
+            log.warning("Event loop blocked for over %.3fs in:\n%s", blocked_for, stack)
+
+    def stats(self) -> dict:
+        return {
+            "stalls": len(self.stalls),
+            "blocked_now": self._current is not None,
+            "last_stall_seconds": self.stalls[-1].duration if self.stalls else None,
+        }
+
+
+# ---------- Sampling Profiler ----------
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename.rsplit("/", 1)[-1]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def sample_stacks(duration: float, interval: float = PROFILE_SAMPLE_INTERVAL,
+                  thread_ids: set | None = None) -> Counter:
+    """
+    Samples the stacks of `thread_ids` (every other thread when None) for
+    `duration` seconds. Returns collapsed stacks, root first, with counts.
+    Blocking: run it on a thread of its own.
+    """
+    me = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    samples = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me or (thread_ids is not None and ident not in thread_ids):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            samples[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return samples
+
+
+def collapsed(samples: Counter) -> str:
+    """
+    Brendan Gregg's collapsed format, readable by flamegraph.pl and speedscope.
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
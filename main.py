@@ -1,25 +1,19 @@
 # ---------- FILE: main.py ----------
+import hashlib
+import json
 import os
-import threading
-from flask import Flask
 import discord
 from discord.ext import commands
 
-from config import TOKEN
-from database import Base, engine
-from cogs import translation, scoring, export_import, utilities
-# Added allcommands cog
-from cogs import allcommands
-
-# ---------- Flask Setup ----------
-app = Flask(__name__)
-
-@app.route("/")
-def home():
-    return "Bot is alive!"
-
-def run_flask():
-    app.run(host="0.0.0.0", port=5000)
+from config import TOKEN, COMMAND_HASH_FILE, SHARD_COUNT, SHARD_IDS, PRIMARY_PROCESS, WEB_ENABLED
+from database import engine
+import migrations
+import channel_cache
+import leaderboard_index
+import metrics
+import web
+from change_log import ChangePoller
+from repository import repo
 
 # ---------- Discord Bot Setup ----------
 intents = discord.Intents.default()
@@ -27,32 +21,97 @@ intents.messages = True
 intents.message_content = True
 intents.reactions = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+COGS = [
+    "cogs.translation",
+    "cogs.scoring",
+    "cogs.export_import",
+    "cogs.utilities",
+    "cogs.maintenance",
+    "cogs.diagnostics",
+    "cogs.allcommands",
+]
+
+
+# ---------- Command Sync ----------
+def command_tree_hash(tree) -> str:
+    """
+    Hash of every global command's payload as Discord would receive it, so
+    any change to a name, description, option or choice changes the hash.
+    """
+    payload = sorted((cmd.to_dict(tree) for cmd in tree.get_commands()), key=lambda c: c["name"])
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+async def sync_commands(tree) -> bool:
+    """
+    Syncs the tree only when its hash differs from the last successful sync.
+    """
+    digest = command_tree_hash(tree)
+    try:
+        with open(COMMAND_HASH_FILE, encoding="utf-8") as f:
+            if f.read().strip() == digest:
+                print("✅ Commands unchanged, skipping sync")
+                return False
+    except FileNotFoundError:
+        pass
+    synced = await tree.sync()
+    with open(COMMAND_HASH_FILE, "w", encoding="utf-8") as f:
+        f.write(digest)
+    print(f"✅ Synced {len(synced)} commands")
+    return True
+
+
+class TranslatorBot(commands.AutoShardedBot):
+    """
+    Runs the shards in SHARD_IDS (all of them when unset). Several processes
+    can each own a shard range and share the database; a change-log poller
+    keeps their in-memory caches in step.
+    """
+    web_runner = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.change_poller = ChangePoller(on_scores_changed=repo.mark_scores_changed)
+
+    async def setup_hook(self):
+        # Runs once per process, before connecting; on_ready fires again on every reconnect
+        if WEB_ENABLED:
+            self.web_runner = await web.start()
+        self.change_poller.start()
+        await load_cogs(self)
+        metrics.instrument_tree(self.tree)
+        if not PRIMARY_PROCESS:
+            return  # commands are global, so one process syncs them
+        try:
+            await sync_commands(self.tree)
+        except Exception as e:
+            print(f"❌ Sync failed: {e}")
+
+    async def close(self):
+        self.change_poller.stop()
+        if self.web_runner is not None:
+            await self.web_runner.cleanup()
+        await super().close()
+
+
+bot = TranslatorBot(command_prefix="!", intents=intents, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS)
 
 # ---------- Load Cogs ----------
-async def load_cogs():
-    await bot.add_cog(translation.TranslationCog(bot))
-    await bot.add_cog(scoring.ScoringCog(bot))
-    await bot.add_cog(export_import.ExportImportCog(bot))
-    await bot.add_cog(utilities.UtilitiesCog(bot))
-    await bot.add_cog(allcommands.AllCommandsCog(bot))  # Load allcommands cog
+async def load_cogs(bot):
+    for extension in COGS:
+        await bot.load_extension(extension)
 
 # ---------- Events ----------
 @bot.event
 async def on_ready():
-    try:
-        await load_cogs()
-        synced = await bot.tree.sync()
-        print(f"✅ Synced {len(synced)} commands")
-    except Exception as e:
-        print(f"❌ Sync failed: {e}")
-    print(f"🤖 Logged in as {bot.user}")
+    shards = ", ".join(str(i) for i in sorted(bot.shards)) or "0"
+    print(f"🤖 Logged in as {bot.user} (shards {shards} of {bot.shard_count})")
 
 # ---------- Main ----------
 if __name__ == "__main__":
-    Base.metadata.create_all(engine)
-
-    flask_thread = threading.Thread(target=run_flask, daemon=True)
-    flask_thread.start()
+    metrics.instrument_engine(engine)
+    migrations.upgrade(engine)
+    channel_cache.load()
+    leaderboard_index.load()
 
     bot.run(TOKEN)
@@ -0,0 +1,279 @@
+# ---------- FILE: metrics.py ----------
+import functools
+import math
+import threading
+import time
+
+# Process-wide metrics registry. Written from the event loop and the DB and
+# provider threads and read by /metrics on the event loop, so every metric
+# locks against writes from the executor and provider threads.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _json_key(key: tuple) -> str:
+    return ",".join(f"{k}={v}" for k, v in key) or "total"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ---------- Metric Types ----------
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> list:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {_json_key(key): value for key, value in self._values.items()}
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram per label set, as Prometheus expects.
+    Quantiles in `snapshot()` are interpolated from the buckets.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> list:
+        out = []
+        with self._lock:
+            for key, series in self._series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    out.append((f"{self.name}_bucket", key + (("le", _format_value(float(bound))),), cumulative))
+                out.append((f"{self.name}_bucket", key + (("le", "+Inf"),), series[-1]))
+                out.append((f"{self.name}_sum", key, series[-2]))
+                out.append((f"{self.name}_count", key, series[-1]))
+        return out
+
+    def _quantile(self, series: list, q: float) -> float:
+        total = series[-1]
+        if not total:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, series):
+            if count and cumulative + count >= rank:
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return self.buckets[-1]  # in the +Inf bucket: report the largest finite bound
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                _json_key(key): {
+                    "count": series[-1],
+                    "sum": round(series[-2], 6),
+                    "avg": series[-2] / series[-1] if series[-1] else 0.0,
+                    "p50": self._quantile(series, 0.5),
+                    "p95": self._quantile(series, 0.95),
+                    "p99": self._quantile(series, 0.99),
+                }
+                for key, series in self._series.items()
+            }
+
+
+class Collected:
+    """
+    A value read on demand from someone else's stats, e.g. a cache hit ratio.
+    `fn` returns a number, or a dict mapping label dicts (as tuples of pairs)
+    to numbers.
+    """
+
+    def __init__(self, name: str, help: str, kind: str, fn):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.fn = fn
+
+    def _values(self) -> dict:
+        value = self.fn()
+        return value if isinstance(value, dict) else {(): value}
+
+    def samples(self) -> list:
+        return [(self.name, key, value) for key, value in self._values().items()]
+
+    def snapshot(self):
+        values = self._values()
+        if list(values) == [()]:
+            return values[()]
+        return {_json_key(key): value for key, value in values.items()}
+
+
+# ---------- Registry ----------
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args)
+            return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._get_or_create(Counter, name, help)
+
+    def histogram(self, name: str, help: str, buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, buckets)
+
+    def collect(self, name: str, help: str, fn, kind: str = "gauge"):
+        # Replaces any earlier collector so a reloaded cog reports its new state
+        with self._lock:
+            self._metrics[name] = Collected(name, help, kind, fn)
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception:
+                continue  # a collector whose owner is gone
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in samples:
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        out = {}
+        for metric in metrics:
+            try:
+                out[metric.name] = metric.snapshot()
+            except Exception:
+                continue
+        return out
+
+
+registry = Registry()
+
+COMMAND_SECONDS = registry.histogram("bot_command_seconds", "App command latency")
+COMMAND_ERRORS = registry.counter("bot_command_errors_total", "App commands that raised")
+EVENT_SECONDS = registry.histogram("bot_event_seconds", "Event listener latency")
+EVENT_ERRORS = registry.counter("bot_event_errors_total", "Event listeners that raised")
+PROVIDER_SECONDS = registry.histogram("translation_provider_seconds", "Translation provider request latency")
+PROVIDER_ERRORS = registry.counter("translation_provider_errors_total", "Failed translation provider requests")
+DB_SECONDS = registry.histogram("db_query_seconds", "SQL statement latency", DB_BUCKETS)
+DB_ERRORS = registry.counter("db_query_errors_total", "SQL statements that raised")
+
+
+# ---------- Instrumentation ----------
+def timed(histogram: Histogram, errors: Counter, **labels):
+    """
+    Decorator for coroutine functions: observes their latency and counts
+    the calls that raised.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception:
+                errors.inc(**labels)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+
+def instrument_tree(tree):
+    """
+    Wraps the callback of every registered app command, so new commands are
+    measured without touching their code. Safe to call more than once.
+    """
+    from discord import app_commands
+    for cmd in tree.walk_commands():
+        if not isinstance(cmd, app_commands.Command) or getattr(cmd._callback, "__instrumented__", False):
+            continue
+        wrapped = timed(COMMAND_SECONDS, COMMAND_ERRORS, command=cmd.qualified_name)(cmd._callback)
+        wrapped.__instrumented__ = True
+        cmd._callback = wrapped
+
+
+def instrument_engine(engine):
+    """
+    Times every SQL statement by its leading keyword (SELECT, INSERT, ...).
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if starts:
+            verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+            DB_SECONDS.observe(time.perf_counter() - starts.pop(), statement=verb)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+        DB_ERRORS.inc()
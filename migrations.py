@@ -0,0 +1,132 @@
+# ---------- FILE: migrations.py ----------
+import datetime
+import logging
+
+from sqlalchemy import text, inspect
+
+from database import Base, CacheChange
+
+log = logging.getLogger(__name__)
+
+# create_all() only creates missing tables; it never alters existing ones.
+# Everything an existing bot_data.db needs beyond that goes here, in order.
+# Migrations must be idempotent because fresh databases already get the
+# current schema (indexes included) from create_all().
+
+
+# ---------- Helpers ----------
+def add_column_if_missing(conn, table: str, column: str, ddl: str):
+    columns = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+# ---------- Migrations ----------
+def _score_history_index(conn):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_score_history_name_category_timestamp "
+        "ON score_history (name_id, category, timestamp)"
+    ))
+
+
+def _translation_cache_indexes(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_translation_cache_created_at ON translation_cache (created_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_translation_cache_last_used ON translation_cache (last_used)"))
+
+
+def _leaderboard_keyset_indexes(conn):
+    # Must match leaderboard.ranked_score() exactly for SQLite to use them
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_names_kill_rank ON names (coalesce(kill_score, 0) DESC, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_names_vs_rank ON names (coalesce(vs_score, 0) DESC, id)"))
+
+
+def _delete_orphan_history(conn):
+    # removename used to leave these behind
+    conn.execute(text("DELETE FROM score_history WHERE name_id IS NULL OR name_id NOT IN (SELECT id FROM names)"))
+
+
+def _cache_changes_autoincrement(conn):
+    # Plain INTEGER PRIMARY KEY reuses ids once pruning empties the table,
+    # which pollers holding a higher last id would never see
+    if conn.dialect.name != "sqlite":
+        return
+    ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'cache_changes'")).scalar()
+    if ddl is None or "AUTOINCREMENT" in ddl.upper():
+        return
+    conn.execute(text("ALTER TABLE cache_changes RENAME TO cache_changes_old"))
+    CacheChange.__table__.create(conn)
+    # Explicit ids seed sqlite_sequence with the old maximum
+    conn.execute(text(
+        "INSERT INTO cache_changes (id, origin, scope, key, created_at) "
+        "SELECT id, origin, scope, key, created_at FROM cache_changes_old"
+    ))
+    conn.execute(text("DROP TABLE cache_changes_old"))
+
+
+MIGRATIONS = [
+    (1, "score_history (name_id, category, timestamp) index", _score_history_index),
+    (2, "translation_cache eviction indexes", _translation_cache_indexes),
+    (3, "names keyset pagination indexes", _leaderboard_keyset_indexes),
+    (4, "delete orphaned score_history rows", _delete_orphan_history),
+    (5, "cache_changes ids never reused", _cache_changes_autoincrement),
+]
+
+
+# ---------- Runner ----------
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at DATETIME NOT NULL)"
+    ))
+
+
+def _version(conn) -> int:
+    _ensure_version_table(conn)
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def current_version(engine) -> int:
+    with engine.begin() as conn:
+        return _version(conn)
+
+
+def _apply_pending(conn) -> list[int]:
+    Base.metadata.create_all(conn)
+    version = _version(conn)
+    applied = []
+    for number, name, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        migrate(conn)
+        conn.execute(
+            text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+            {"v": number, "n": name, "t": datetime.datetime.utcnow()}
+        )
+        log.info("Applied migration %s: %s", number, name)
+        applied.append(number)
+    return applied
+
+
+def upgrade(engine) -> list[int]:
+    """
+    Creates missing tables, then applies every pending migration. Returns
+    the versions that were applied.
+
+    Several bot processes may start at once against the same SQLite file,
+    so everything runs in one BEGIN IMMEDIATE transaction: the first process
+    upgrades, the others wait on the write lock and then find nothing to do.
+    """
+    with engine.connect() as conn:
+        if engine.dialect.name != "sqlite":
+            with conn.begin():
+                return _apply_pending(conn)
+        # Take over transaction control from pysqlite so the lock is held from the start
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            applied = _apply_pending(conn)
+        except Exception:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+        conn.exec_driver_sql("COMMIT")
+        return applied
@@ -0,0 +1,153 @@
+# ---------- FILE: name_index.py ----------
+from bisect import bisect_left, insort
+from collections import Counter
+
+from config import NAME_SUGGEST_THRESHOLD, NAME_CANDIDATE_BUDGET
+
+AUTOCOMPLETE_BUDGET = 500  # smaller fuzzy scan per keystroke than for "did you mean"
+
+
+def fold(name: str) -> str:
+    return name.casefold().strip()
+
+
+def trigrams(name: str) -> set[str]:
+    # Padded like pg_trgm, so short names and word starts still get trigrams
+    padded = f"  {fold(name)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: set, b: set) -> float:
+    """
+    Dice coefficient of two trigram sets (1.0 = same trigrams).
+    """
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+# ---------- Name Index ----------
+class NameIndex:
+    """
+    Every tracked name, searchable by case-insensitive prefix (a bisect into
+    a sorted list) and by trigram similarity (an inverted trigram index).
+    Both are updated in place, so autocomplete never touches the database.
+    """
+
+    def __init__(self, names=()):
+        self._names = set(names)
+        self._sorted = sorted((fold(name), name) for name in self._names)
+        self._postings = {}  # trigram -> set of names containing it
+        for name in self._names:
+            for gram in trigrams(name):
+                self._postings.setdefault(gram, set()).add(name)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def add(self, name: str) -> bool:
+        if name in self._names:
+            return False
+        self._names.add(name)
+        insort(self._sorted, (fold(name), name))
+        for gram in trigrams(name):
+            self._postings.setdefault(gram, set()).add(name)
+        return True
+
+    def remove(self, name: str) -> bool:
+        if name not in self._names:
+            return False
+        self._names.discard(name)
+        del self._sorted[bisect_left(self._sorted, (fold(name), name))]
+        for gram in trigrams(name):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(name)
+                if not posting:
+                    del self._postings[gram]
+        return True
+
+    # ---------- Lookups ----------
+    def complete(self, prefix: str, limit: int = 25) -> list[str]:
+        """
+        Names starting with `prefix` (ignoring case) in alphabetical order.
+        When fewer than `limit` match, the closest fuzzy matches follow, so a
+        typo in the first letters still finds the name.
+        """
+        key = fold(prefix)
+        found = []
+        i = bisect_left(self._sorted, (key,))
+        while i < len(self._sorted) and len(found) < limit and self._sorted[i][0].startswith(key):
+            found.append(self._sorted[i][1])
+            i += 1
+        if len(found) < limit and len(key) >= 3:
+            seen = set(found)
+            fuzzy = self.similar(prefix, limit - len(found), threshold=0.3, budget=AUTOCOMPLETE_BUDGET)
+            found += [name for name, _ in fuzzy if name not in seen]
+        return found[:limit]
+
+    def similar(self, name: str, limit: int = 5, threshold: float = NAME_SUGGEST_THRESHOLD,
+                budget: int = NAME_CANDIDATE_BUDGET, exclude_self: bool = True) -> list[tuple[str, float]]:
+        """
+        Tracked names whose trigrams resemble `name`'s, as (name, score)
+        best first. Candidates come from the rarest trigrams' postings until
+        `budget` names have been counted, so a query costs about the same
+        however many names share common trigrams like "pla".
+        """
+        grams = trigrams(name)
+        postings = sorted((self._postings[gram] for gram in grams if gram in self._postings), key=len)
+        counts = Counter()
+        for posting in postings:
+            if counts and len(posting) > budget:
+                break
+            counts.update(posting)
+            budget -= len(posting)
+
+        scored = []
+        for candidate, _ in counts.most_common(limit * 10):
+            if exclude_self and candidate == name:
+                continue
+            score = similarity(grams, trigrams(candidate))
+            if score >= threshold:
+                scored.append((candidate, score))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+
+# ---------- Process-wide Index ----------
+# Kept in step with the leaderboard indexes by leaderboard_index
+_index = NameIndex()
+
+
+def install(index: NameIndex):
+    global _index
+    _index = index
+
+
+def get() -> NameIndex:
+    return _index
+
+
+def add(name: str):
+    _index.add(name)
+
+
+def remove(name: str):
+    _index.remove(name)
+
+
+def complete(prefix: str, limit: int = 25) -> list[str]:
+    return _index.complete(prefix, limit)
+
+
+def suggest(name: str, limit: int = 3) -> list[str]:
+    """
+    Existing names `name` is probably a typo of ("did you mean"): names that
+    differ only by case first, then close trigram matches.
+    """
+    if name in _index:
+        return []
+    return [match for match, _ in _index.similar(name, limit)]
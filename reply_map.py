@@ -0,0 +1,73 @@
+# ---------- FILE: reply_map.py ----------
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from translation_cache import normalize_text
+from config import REPLY_MAP_MAX_AGE, REPLY_MAP_SIZE
+
+HASH_BYTES = 8  # per segment; only compared with the same message's next version
+
+
+def segment_hashes(segments: list[str], src: str, tgt: str) -> bytes:
+    """
+    One short digest per segment, concatenated. The language pair is part of
+    each digest, so a flipped detection counts as a change.
+    """
+    return b"".join(
+        hashlib.blake2b(f"{src}\0{tgt}\0{normalize_text(segment)}".encode("utf-8"), digest_size=HASH_BYTES).digest()
+        for segment in segments
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class ReplyEntry:
+    created: float
+    reply_ids: tuple  # translation replies, in order
+    hashes: bytes  # segment_hashes() of the text they translate
+
+    def changed_segments(self, hashes: bytes) -> int:
+        """
+        How many segments of a new version are not in this one.
+        """
+        old = {self.hashes[i:i + HASH_BYTES] for i in range(0, len(self.hashes), HASH_BYTES)}
+        return sum(hashes[i:i + HASH_BYTES] not in old for i in range(0, len(hashes), HASH_BYTES))
+
+
+class ReplyMap:
+    """
+    Source message id -> its translation replies and segment hashes, so edits
+    and deletes can find the replies without fetching anything. Entries are
+    dropped once older than `max_age` (nobody edits a day-old message) or,
+    oldest first, when there are more than `max_size`, keeping memory flat.
+    """
+
+    def __init__(self, max_age: float = REPLY_MAP_MAX_AGE, max_size: int = REPLY_MAP_SIZE):
+        self.max_age = max_age
+        self.max_size = max_size
+        self._entries = OrderedDict()  # insertion order is age order
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, now: float):
+        while self._entries:
+            message_id, entry = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_size and now - entry.created <= self.max_age:
+                break
+            del self._entries[message_id]
+
+    def get(self, message_id: int) -> ReplyEntry | None:
+        self._evict(time.monotonic())
+        return self._entries.get(message_id)
+
+    def put(self, message_id: int, reply_ids, hashes: bytes):
+        # An edit keeps the entry's original age: it is still the same message
+        old = self._entries.get(message_id)
+        now = time.monotonic()
+        self._entries[message_id] = ReplyEntry(old.created if old else now, tuple(reply_ids), hashes)
+        self._evict(now)
+
+    def pop(self, message_id: int) -> ReplyEntry | None:
+        return self._entries.pop(message_id, None)
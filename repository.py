@@ -0,0 +1,218 @@
+# ---------- FILE: repository.py ----------
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from sqlalchemy import select
+
+from database import SessionLocal, Channel, Name, ScoreHistory, ScoreHistoryDaily
+from channel_cache import ChannelConfig
+from leaderboard import ScoreDiff, score_diffs, score_page
+from score_import import ImportSummary, apply_import
+from score_history import history_series
+from history_maintenance import MaintenanceReport, run_maintenance
+import change_log
+
+
+@dataclass(frozen=True)
+class ScoreUpdate:
+    name_id: int
+    new_total: int  # score after the update (the unchanged score when ignored)
+    diff: int
+    updated: bool
+    created: bool  # the name did not exist before
+
+
+# ---------- Score Rule ----------
+def apply_score_rule(session, name_obj: Name, new_val: int, category: str):
+    """
+    Only-increase rule: an unset/zero score is always replaced, otherwise
+    the new value must be higher. Accepted updates append a ScoreHistory row.
+    """
+    if category == "kill":
+        current = name_obj.kill_score
+    else:
+        current = name_obj.vs_score
+
+    if current is None or current == 0:
+        if category == "kill":
+            name_obj.kill_score = new_val
+        else:
+            name_obj.vs_score = new_val
+        session.add(ScoreHistory(name=name_obj, category=category, value=new_val))
+        return new_val, new_val, True
+
+    if new_val > current:
+        diff = new_val - current
+        if category == "kill":
+            name_obj.kill_score = new_val
+        else:
+            name_obj.vs_score = new_val
+        session.add(ScoreHistory(name=name_obj, category=category, value=new_val))
+        return new_val, diff, True
+
+    return current, 0, False
+
+
+# ---------- Session Functions (run on the DB thread) ----------
+def _list_channels(session) -> list[ChannelConfig]:
+    return [ChannelConfig.from_row(row) for row in session.query(Channel).all()]
+
+
+def _add_channel(session, channel_id: int, lang1: str, lang2: str, flags: list) -> tuple[ChannelConfig, bool]:
+    existing = session.query(Channel).filter_by(channel_id=str(channel_id)).first()
+    if existing:
+        return ChannelConfig.from_row(existing), False
+    row = Channel(channel_id=str(channel_id), lang1=lang1, lang2=lang2, flags=json.dumps(flags))
+    session.add(row)
+    change_log.record(session, "channel", channel_id)
+    session.commit()
+    return ChannelConfig.from_row(row), True
+
+
+def _remove_channel(session, channel_id: int) -> bool:
+    row = session.query(Channel).filter_by(channel_id=str(channel_id)).first()
+    if not row:
+        return False
+    session.delete(row)
+    change_log.record(session, "channel", channel_id)
+    session.commit()
+    return True
+
+
+def _upsert_score(session, name: str, category: str, value: int) -> ScoreUpdate:
+    obj = session.query(Name).filter_by(name=name).first()
+    created = obj is None
+    if created:
+        obj = Name(name=name)
+        session.add(obj)
+        session.flush()
+    new_total, diff, updated = apply_score_rule(session, obj, value, category)
+    if created or updated:
+        change_log.record(session, "name", obj.id)
+    session.commit()
+    return ScoreUpdate(obj.id, new_total, diff, updated, created)
+
+
+def _remove_name(session, name: str) -> int | None:
+    obj = session.query(Name).filter_by(name=name).first()
+    if not obj:
+        return None
+    name_id = obj.id
+    # Bulk deletes instead of ORM cascades so history is never loaded into memory
+    session.query(ScoreHistory).filter_by(name_id=name_id).delete(synchronize_session=False)
+    session.query(ScoreHistoryDaily).filter_by(name_id=name_id).delete(synchronize_session=False)
+    session.delete(obj)
+    change_log.record(session, "name_removed", name)
+    session.commit()
+    return name_id
+
+
+def _history(session, name: str, category: str, limit: int | None) -> list[tuple]:
+    stmt = (
+        select(ScoreHistory.timestamp, ScoreHistory.value)
+        .join(Name, Name.id == ScoreHistory.name_id)
+        .where(Name.name == name, ScoreHistory.category == category)
+        .order_by(ScoreHistory.timestamp.desc(), ScoreHistory.id.desc())
+    )
+    if limit:
+        stmt = stmt.limit(limit)
+    return [tuple(row) for row in session.execute(stmt)]
+
+
+# ---------- Repository ----------
+class Repository:
+    """
+    Async data access for the cogs. Every query runs on one dedicated DB
+    thread (its executor queue is the request queue), so the event loop
+    never blocks on SQLite and writes are naturally serialized.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+        # Long streaming reads (exports) get their own thread so they don't
+        # queue every other query behind them; WAL lets them read concurrently
+        self.read_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-read")
+        # Bumped on every score change; lets caches key derived data (charts) cheaply
+        self.score_version = 0
+
+    async def run(self, fn, *args):
+        """
+        Runs `fn(session, *args)` on the DB thread with a fresh session.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._call, fn, args)
+
+    async def run_readonly(self, fn, *args):
+        """
+        Like run(), but on the streaming-read thread. `fn` must not write.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.read_executor, self._call, fn, args)
+
+    @staticmethod
+    def _call(fn, args):
+        session = SessionLocal()
+        try:
+            return fn(session, *args)
+        finally:
+            session.close()
+
+    # ---------- Channels ----------
+    async def list_channels(self) -> list[ChannelConfig]:
+        return await self.run(_list_channels)
+
+    async def add_channel(self, channel_id: int, lang1: str, lang2: str, flags: list) -> tuple[ChannelConfig, bool]:
+        return await self.run(_add_channel, channel_id, lang1, lang2, flags)
+
+    async def remove_channel(self, channel_id: int) -> bool:
+        return await self.run(_remove_channel, channel_id)
+
+    # ---------- Scores ----------
+    async def upsert_score(self, name: str, category: str, value: int) -> ScoreUpdate:
+        result = await self.run(_upsert_score, name, category, value)
+        if result.updated or result.created:
+            self.score_version += 1
+        return result
+
+    async def remove_name(self, name: str) -> int | None:
+        name_id = await self.run(_remove_name, name)
+        if name_id is not None:
+            self.score_version += 1
+        return name_id
+
+    async def leaderboard(self, category: str, ranked: bool = True) -> list[ScoreDiff]:
+        return await self.run(score_diffs, category, ranked)
+
+    async def leaderboard_page(self, category: str, after: tuple | None = None, limit: int = 25) -> list[ScoreDiff]:
+        return await self.run(score_page, category, after, limit)
+
+    async def history(self, name: str, category: str, limit: int | None = None) -> list[tuple]:
+        return await self.run(_history, name, category, limit)
+
+    async def history_series(self, names: list[str], category: str, period: str, bucket: str | None = None) -> dict:
+        return await self.run(history_series, names, category, period, bucket)
+
+    async def run_maintenance(self, retention_days: int) -> MaintenanceReport:
+        report = await self.run(run_maintenance, retention_days)
+        if report.rows_compacted:
+            self.score_version += 1
+        return report
+
+    async def import_scores(self, df, category: str, dry_run: bool = False) -> ImportSummary:
+        summary = await self.run(apply_import, df, category, dry_run)
+        if summary.changed and not dry_run:
+            self.score_version += 1
+        return summary
+
+    def mark_scores_changed(self):
+        # Scores changed outside this process (see change_log.ChangePoller)
+        self.score_version += 1
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.read_executor.shutdown(wait=True)
+
+
+repo = Repository()
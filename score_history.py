@@ -0,0 +1,84 @@
+# ---------- FILE: score_history.py ----------
+import datetime
+
+from sqlalchemy import select, func, union_all
+
+from database import Name, ScoreHistory, ScoreHistoryDaily
+
+PERIODS = {
+    "7d": datetime.timedelta(days=7),
+    "30d": datetime.timedelta(days=30),
+    "90d": datetime.timedelta(days=90),
+    "365d": datetime.timedelta(days=365),
+    "all": None,
+}
+
+# Bucket used when the caller doesn't pick one: keeps every series to a few hundred points
+DEFAULT_BUCKETS = {"7d": "hour", "30d": "day", "90d": "day", "365d": "week", "all": "week"}
+
+
+def bucket_expr(column, bucket: str):
+    """
+    SQLite expression truncating a timestamp to the start of its bucket
+    (weeks start on Monday), returned as 'YYYY-MM-DD HH:MM:SS' text.
+    """
+    if bucket == "hour":
+        return func.strftime("%Y-%m-%d %H:00:00", column)
+    if bucket == "week":
+        return func.strftime("%Y-%m-%d 00:00:00", column, "-6 days", "weekday 1")
+    return func.strftime("%Y-%m-%d 00:00:00", column)
+
+
+def window_key(period: str, bucket: str | None = None) -> datetime.datetime | None:
+    """
+    Start of the current bucket for rolling periods (None for "all"), so a
+    cached series or chart is rebuilt once the window has moved on by a bucket
+    even if no score changed.
+    """
+    if PERIODS[period] is None:
+        return None
+    now = datetime.datetime.utcnow()
+    bucket = bucket or DEFAULT_BUCKETS[period]
+    if bucket == "hour":
+        return now.replace(minute=0, second=0, microsecond=0)
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    return day
+
+
+def history_series(session, names: list[str], category: str, period: str, bucket: str | None = None) -> dict:
+    """
+    Max value per name and bucket, computed in SQL, so a year of raw rows
+    comes back as one point per bucket. Days that maintenance already rolled
+    up into score_history_daily are read from there.
+    Returns {name: [(datetime, value), ...]}.
+    """
+    bucket = bucket or DEFAULT_BUCKETS[period]
+    start = PERIODS[period]
+    raw = (
+        select(ScoreHistory.name_id, ScoreHistory.timestamp.label("ts"), ScoreHistory.value)
+        .where(ScoreHistory.category == category)
+    )
+    daily = (
+        select(ScoreHistoryDaily.name_id, ScoreHistoryDaily.day.label("ts"), ScoreHistoryDaily.value)
+        .where(ScoreHistoryDaily.category == category)
+    )
+    if start is not None:
+        since = datetime.datetime.utcnow() - start
+        raw = raw.where(ScoreHistory.timestamp >= since)
+        daily = daily.where(ScoreHistoryDaily.day >= since.date())
+    points = union_all(raw, daily).subquery()
+
+    slot = bucket_expr(points.c.ts, bucket).label("slot")
+    stmt = (
+        select(Name.name, slot, func.max(points.c.value))
+        .join(Name, Name.id == points.c.name_id)
+        .where(Name.name.in_(names))
+        .group_by(Name.name, slot)
+        .order_by(Name.name, slot)
+    )
+    series = {name: [] for name in names}
+    for name, when, value in session.execute(stmt):
+        series[name].append((datetime.datetime.strptime(when, "%Y-%m-%d %H:%M:%S"), value))
+    return series
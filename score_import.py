@@ -0,0 +1,154 @@
+# ---------- FILE: score_import.py ----------
+import datetime
+from dataclasses import dataclass, field
+from io import BytesIO
+
+from sqlalchemy import select, insert, update
+
+from database import Name, ScoreHistory
+from leaderboard import score_column
+import change_log
+
+# pandas is imported inside each function: it is the slowest import in the bot
+# and only imports need it.
+
+# SQLite caps bound parameters per statement, so IN lookups are chunked
+IN_CHUNK = 500
+# Scores are stored as SQLite INTEGER
+SCORE_MIN, SCORE_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+@dataclass
+class ImportSummary:
+    parsed: int = 0  # rows with a usable name and score
+    skipped: int = 0  # unparseable rows and duplicate names folded into one
+    inserted: int = 0
+    updated: int = 0
+    ignored: int = 0  # existing names whose score did not increase
+    dry_run: bool = False
+    category: str = ""
+    changes: list = field(default_factory=list)  # (name_id, name, new score) written by the import
+    new_names: list = field(default_factory=list)  # names not tracked before (also filled on dry runs)
+
+    @property
+    def changed(self) -> int:
+        return self.inserted + self.updated
+
+
+# ---------- Parsing ----------
+def read_csv_scores(file_bytes: bytes) -> "pandas.DataFrame":
+    """
+    First column is the name, second the score; the header row is skipped,
+    as are fields past the second (a trailing comma is not an index column).
+    """
+    import pandas as pd
+    options = dict(header=None, skiprows=1, index_col=False, dtype=str, keep_default_na=False, on_bad_lines="skip")
+    try:
+        df = pd.read_csv(BytesIO(file_bytes), usecols=[0, 1], **options)
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame({"Name": [], "Score": []})
+    except ValueError:
+        # A single column: no row has a score, so they all count as skipped
+        df = pd.read_csv(BytesIO(file_bytes), usecols=[0], **options)
+        df[1] = ""
+    df.columns = ["Name", "Score"]
+    return df
+
+
+def read_excel_scores(file_bytes: bytes) -> "pandas.DataFrame":
+    import pandas as pd
+    df = pd.read_excel(BytesIO(file_bytes), dtype=str)
+    score = df["Score"] if "Score" in df.columns else "0"
+    return pd.DataFrame({"Name": df["Name"], "Score": score})
+
+
+def clean_scores(df: "pandas.DataFrame") -> "pandas.DataFrame":
+    """
+    Vectorized version of the per-row cleanup: strips "(+diff)" suffixes and
+    thousands separators, drops unparseable rows and keeps one row per name
+    (its highest score, which is where repeated "only increase" updates end up).
+    Scores must be whole numbers that fit in an INTEGER column; "12.7", "inf"
+    and "1e30" are skipped like any other unparseable cell.
+    """
+    import pandas as pd
+    names = df["Name"].astype(str).str.strip()
+    scores = (
+        df["Score"].astype(str)
+        .str.split("(", n=1).str[0]
+        .str.strip()
+        .str.replace(",", "", regex=False)
+    )
+    # Integer strings are converted exactly; floats only when whole ("100.0" from Excel)
+    is_int = scores.str.fullmatch(r"[+-]?\d+")
+    floats = pd.to_numeric(scores.where(~is_int), errors="coerce")
+    is_whole = (floats % 1 == 0)  # False for NaN and inf
+    values = pd.Series(None, index=scores.index, dtype=object)
+    values[is_int] = scores[is_int].map(int)
+    values[is_whole] = floats[is_whole].map(int)
+    in_range = values.map(lambda v: v is not None and SCORE_MIN <= v <= SCORE_MAX)
+    mask = in_range & df["Name"].notna() & (names != "")
+    cleaned = pd.DataFrame({"name": names[mask], "value": values[mask].astype("int64")})
+    return cleaned.groupby("name", as_index=False, sort=False)["value"].max()
+
+
+# ---------- Bulk Apply ----------
+def _existing_scores(session, names: list[str], category: str) -> "pandas.DataFrame":
+    import pandas as pd
+    column = score_column(category)
+    rows = []
+    for i in range(0, len(names), IN_CHUNK):
+        chunk = names[i:i + IN_CHUNK]
+        rows.extend(session.execute(select(Name.id, Name.name, column).where(Name.name.in_(chunk))).all())
+    return pd.DataFrame(rows, columns=["id", "name", "current"])
+
+
+def apply_import(session, df: "pandas.DataFrame", category: str, dry_run: bool = False) -> ImportSummary:
+    """
+    Applies the "only increase" rule to every row at once and writes all
+    inserts, updates and ScoreHistory rows in a single transaction.
+    """
+    import pandas as pd
+    category = "kill" if category.lower() == "kill" else "vs"
+    field = score_column(category).key
+    raw_rows = len(df)
+    df = clean_scores(df)
+    summary = ImportSummary(parsed=len(df), skipped=raw_rows - len(df), dry_run=dry_run, category=category)
+    if df.empty:
+        return summary
+
+    merged = df.merge(_existing_scores(session, df["name"].tolist(), category), on="name", how="left")
+    is_new = merged["id"].isna()
+    current = merged["current"].fillna(0)
+    # Matches ScoringCog.update_score: an unset/zero score is always replaced
+    is_update = ~is_new & ((current == 0) | (merged["value"] > current))
+
+    new_rows = merged[is_new]
+    updates = merged[is_update]
+    summary.inserted = len(new_rows)
+    summary.updated = len(updates)
+    summary.ignored = int((~is_new & ~is_update).sum())
+    summary.new_names = new_rows["name"].tolist()
+    if dry_run or (new_rows.empty and updates.empty):
+        return summary
+
+    try:
+        if not new_rows.empty:
+            session.execute(insert(Name), [{"name": n, field: int(v)} for n, v in zip(new_rows["name"], new_rows["value"])])
+            new_ids = _existing_scores(session, new_rows["name"].tolist(), category)
+            new_rows = new_rows.drop(columns=["id"]).merge(new_ids[["id", "name"]], on="name")
+        if not updates.empty:
+            session.execute(update(Name), [{"id": int(i), field: int(v)} for i, v in zip(updates["id"], updates["value"])])
+
+        now = datetime.datetime.utcnow()
+        changed = pd.concat([new_rows[["id", "name", "value"]], updates[["id", "name", "value"]]])
+        session.execute(insert(ScoreHistory), [
+            {"name_id": int(i), "category": category, "value": int(v), "timestamp": now}
+            for i, v in zip(changed["id"], changed["value"])
+        ])
+        change_log.record(session, "scores")
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    summary.changes = [(int(i), n, int(v)) for i, n, v in zip(changed["id"], changed["name"], changed["value"])]
+    return summary
@@ -0,0 +1,85 @@
+# ---------- FILE: text_segments.py ----------
+import re
+import zlib
+from dataclasses import dataclass
+
+from config import TRANSLATE_SEGMENT_CHARS
+
+# Whitespace after sentence-ending punctuation (Latin, CJK and ellipsis)
+SENTENCE_END = re.compile(r"(?<=[.!?…。！？])\s+")
+# About one line/sentence in this many ends a segment, chosen by its content
+BREAK_EVERY = 3
+
+
+@dataclass(frozen=True)
+class Segment:
+    text: str
+    sep: str  # what followed it in the original: "\n", " " or "" for the last one
+
+
+def _units(text: str, max_chars: int) -> list[Segment]:
+    """
+    Lines, each split into sentences, and sentences longer than `max_chars`
+    split at spaces (or anywhere, for very long words).
+    """
+    units = []
+    lines = text.split("\n")
+    for i, line in enumerate(lines):
+        line_sep = "\n" if i < len(lines) - 1 else ""
+        pieces = []
+        for sentence in SENTENCE_END.split(line) if len(line) > max_chars else [line]:
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars + 1)
+                if cut > 0:
+                    pieces.append(Segment(sentence[:cut], " "))
+                    sentence = sentence[cut:].lstrip(" ")
+                else:
+                    pieces.append(Segment(sentence[:max_chars], ""))
+                    sentence = sentence[max_chars:]
+            pieces.append(Segment(sentence, " "))
+        units += pieces[:-1] + [Segment(pieces[-1].text, line_sep)]
+    return units
+
+
+def _ends_segment(unit: Segment) -> bool:
+    # Content-defined: the same sentence ends a segment wherever it moves to,
+    # so an edit only changes the segments around it, not every later one
+    return unit.text == "" or zlib.crc32(unit.text.encode("utf-8")) % BREAK_EVERY == 0
+
+
+def segment_text(text: str, max_chars: int = TRANSLATE_SEGMENT_CHARS) -> list[Segment]:
+    """
+    Splits text into segments of at most `max_chars`, breaking only at line
+    and sentence boundaries where it can. Neighbouring lines and sentences
+    are packed together to keep provider calls down, and a text that fits
+    is one segment. Where a segment ends depends on the sentences around it,
+    not on its position, so edited texts re-use most earlier segments.
+    `"".join(s.text + s.sep for s in segments)` gives the text back, with
+    the whitespace between sentences of a split line collapsed to one space.
+    """
+    if len(text) <= max_chars:
+        return [Segment(text, "")]
+    segments = []
+    current, current_sep = None, ""
+    for unit in _units(text, max_chars):
+        if current is not None and len(current) + len(current_sep) + len(unit.text) <= max_chars:
+            current += current_sep + unit.text
+        else:
+            if current is not None:
+                segments.append(Segment(current, current_sep))
+            current = unit.text
+        current_sep = unit.sep
+        if _ends_segment(unit):
+            segments.append(Segment(current, current_sep))
+            current, current_sep = None, ""
+    if current is not None:
+        segments.append(Segment(current, current_sep))
+    return segments
+
+
+def join_segments(segments: list[Segment], texts: list[str]) -> str:
+    """
+    Reassembles translated `texts` (one per segment, in order) with the
+    original separators.
+    """
+    return "".join(text + segment.sep for segment, text in zip(segments, texts))
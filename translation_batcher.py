@@ -0,0 +1,94 @@
+# ---------- FILE: translation_batcher.py ----------
+import asyncio
+import time
+from collections import deque
+
+from config import HF_BATCH_WINDOW, HF_BATCH_MAX
+
+
+class BatchScheduler:
+    """
+    Collects texts per key (an HF model, i.e. one src/tgt pair) for up to
+    `window` seconds or `max_batch` items and sends them as one request.
+    `send_batch(key, texts)` must return one translation per text, in order.
+    """
+
+    def __init__(self, send_batch, window: float = HF_BATCH_WINDOW, max_batch: int = HF_BATCH_MAX):
+        self.send_batch = send_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = {}  # key -> list of (text, future, enqueued_at)
+        self._timers = {}  # key -> TimerHandle for the window flush
+        self._tasks = set()
+        # ---------- Stats ----------
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self._recent_sizes = deque(maxlen=1000)
+        self._recent_waits = deque(maxlen=1000)
+
+    async def submit(self, key, text: str) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((text, future, time.monotonic()))
+        if len(pending) >= self.max_batch:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        items = self._pending.pop(key, None)
+        if not items:
+            return
+        task = asyncio.ensure_future(self._send(key, items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, key, items):
+        now = time.monotonic()
+        self.batches += 1
+        self.items += len(items)
+        self.max_batch_seen = max(self.max_batch_seen, len(items))
+        self._recent_sizes.append(len(items))
+        self._recent_waits.extend(now - enqueued_at for _, _, enqueued_at in items)
+        try:
+            results = await self.send_batch(key, [text for text, _, _ in items])
+            if len(results) != len(items):
+                raise ValueError(f"expected {len(items)} results, got {len(results)}")
+        except Exception as e:
+            # Callers fall back to another provider only on ProviderError
+            from translation_providers import ProviderError  # circular at import time
+            error = e
+            if not isinstance(e, ProviderError):
+                error = ProviderError(f"HF batch failed: {e!r}")
+                error.__cause__ = e
+            for _, future, _ in items:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, future, _), result in zip(items, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        for key in list(self._pending):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        waits = sorted(self._recent_waits)
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "recent_avg_batch_size": sum(self._recent_sizes) / len(self._recent_sizes) if self._recent_sizes else 0.0,
+            "queue_wait_p50": waits[len(waits) // 2] if waits else 0.0,
+            "queue_wait_max": waits[-1] if waits else 0.0,
+        }
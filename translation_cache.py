@@ -0,0 +1,165 @@
+# ---------- FILE: translation_cache.py ----------
+import datetime
+import hashlib
+import time
+import unicodedata
+from collections import OrderedDict
+
+from sqlalchemy import update
+
+from database import TranslationCacheEntry
+from repository import repo
+from config import HF_MODELS, TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_TTL, TRANSLATION_CACHE_DB_MAX
+
+
+# ---------- Key Helpers ----------
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def provider_for(src: str, tgt: str) -> str:
+    return HF_MODELS.get((src, tgt), "google")
+
+
+def cache_key(text: str, src: str, tgt: str) -> str:
+    raw = "\0".join((provider_for(src, tgt), src, tgt, normalize_text(text)))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# ---------- In-memory LRU ----------
+class LRUCache:
+    def __init__(self, max_size: int = TRANSLATION_CACHE_SIZE, ttl: float = TRANSLATION_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+# ---------- Two-tier Cache ----------
+class TranslationCache:
+    """
+    Bounded LRU in front of the persistent `translation_cache` table.
+    Database work runs on the repository's DB thread.
+    """
+
+    # Persistent eviction is amortized over this many writes
+    PRUNE_EVERY = 200
+    # A hit only refreshes last_used when it is older than this, in seconds
+    TOUCH_INTERVAL = 3600
+
+    def __init__(self, max_size: int = TRANSLATION_CACHE_SIZE, ttl: int = TRANSLATION_CACHE_TTL,
+                 db_max_rows: int = TRANSLATION_CACHE_DB_MAX):
+        self.memory = LRUCache(max_size, ttl)
+        self.ttl = ttl
+        self.db_max_rows = db_max_rows
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._touched = {}  # key -> last_used not yet written
+
+    async def get(self, text: str, src: str, tgt: str) -> str | None:
+        key = cache_key(text, src, tgt)
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+        value = await repo.run(self._db_get, key)
+        if value is not None:
+            self.db_hits += 1
+            self.memory.put(key, value)
+            return value
+        self.misses += 1
+        return None
+
+    async def put(self, text: str, src: str, tgt: str, translation: str, provider: str | None = None):
+        """
+        Stores a translation made by `provider` (default: the pair's own).
+        Lookups only ask for the pair's own provider, so a fallback answer
+        is not stored: it would be served as that provider's until the TTL.
+        """
+        if provider is not None and provider != provider_for(src, tgt):
+            return
+        key = cache_key(text, src, tgt)
+        self.memory.put(key, translation)
+        self._writes += 1
+        prune = self._writes % self.PRUNE_EVERY == 0
+        await repo.run(self._db_put, key, provider_for(src, tgt), src, tgt, translation, prune)
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        hits = self.memory_hits + self.db_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+        }
+
+    async def db_entries(self) -> int:
+        return await repo.run(lambda session: session.query(TranslationCacheEntry).count())
+
+    # ---------- Persistent Tier ----------
+    def _db_get(self, session, key: str) -> str | None:
+        # Read-only: expired rows are left to the prune, and last_used is only
+        # noted here and written with the next put, so hits never commit
+        entry = session.get(TranslationCacheEntry, key)
+        if entry is None:
+            return None
+        now = datetime.datetime.utcnow()
+        if entry.created_at < now - datetime.timedelta(seconds=self.ttl):
+            return None
+        if entry.last_used < now - datetime.timedelta(seconds=self.TOUCH_INTERVAL):
+            self._touched[key] = now
+        return entry.translation
+
+    def _db_put(self, session, key: str, provider: str, src: str, tgt: str, translation: str, prune: bool):
+        self._db_touch(session)
+        session.merge(TranslationCacheEntry(
+            key=key, provider=provider, src=src, tgt=tgt, translation=translation,
+            created_at=datetime.datetime.utcnow(), last_used=datetime.datetime.utcnow()
+        ))
+        session.commit()
+        if prune:
+            self._db_prune(session)
+
+    def _db_touch(self, session):
+        """
+        Writes the last_used times noted by lookups since the last put. Only
+        eviction order depends on them, and eviction happens on puts.
+        """
+        touched, self._touched = self._touched, {}
+        if touched:
+            session.execute(
+                update(TranslationCacheEntry),
+                [{"key": key, "last_used": when} for key, when in touched.items()],
+            )
+
+    def _db_prune(self, session):
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=self.ttl)
+        session.query(TranslationCacheEntry).filter(TranslationCacheEntry.created_at < cutoff).delete(synchronize_session=False)
+        overflow = session.query(TranslationCacheEntry).count() - self.db_max_rows
+        if overflow > 0:
+            oldest = session.query(TranslationCacheEntry.key).order_by(TranslationCacheEntry.last_used.asc()).limit(overflow)
+            session.query(TranslationCacheEntry).filter(TranslationCacheEntry.key.in_(oldest.scalar_subquery())).delete(synchronize_session=False)
+        session.commit()
@@ -0,0 +1,231 @@
+# ---------- FILE: translation_providers.py ----------
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+from translation_batcher import BatchScheduler
+from metrics import PROVIDER_SECONDS, PROVIDER_ERRORS
+from config import (
+    HF_API_URL, HF_KEY, HF_MODELS, HF_TIMEOUT, HF_CONCURRENCY,
+    GOOGLE_TIMEOUT, GOOGLE_CONCURRENCY, BREAKER_FAILURES, BREAKER_COOLDOWN
+)
+
+
+class ProviderError(Exception):
+    """
+    Raised when a provider cannot return a translation.
+    """
+
+
+# ---------- Circuit Breaker ----------
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    until `cooldown` seconds have passed; then lets one trial call through
+    and keeps rejecting the rest until that call succeeds or fails.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_at = None  # when the half-open trial call was let through
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state != "half-open":
+            return state == "closed"
+        now = time.monotonic()
+        # A trial that never reported back (cancelled) stops blocking after a cooldown
+        if self.trial_at is not None and now - self.trial_at < self.cooldown:
+            return False
+        self.trial_at = now
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_at = None
+        if self.failures >= self.failure_threshold:
+            # Re-arms the cool-down when a half-open trial call fails too
+            self.opened_at = time.monotonic()
+
+
+# ---------- Hugging Face ----------
+class HuggingFaceProvider:
+    name = "hf"
+
+    def __init__(self, api_url: str = HF_API_URL, api_key: str = HF_KEY,
+                 timeout: float = HF_TIMEOUT, concurrency: int = HF_CONCURRENCY):
+        self.api_url = api_url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.breakers = {}  # one breaker per model
+        self._session = None
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        if model not in self.breakers:
+            self.breakers[model] = CircuitBreaker()
+        return self.breakers[model]
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so it binds to the bot's running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(headers=self.headers, timeout=self.timeout, connector=connector)
+        return self._session
+
+    async def translate(self, text: str, model: str) -> str:
+        return (await self.translate_batch([text], model))[0]
+
+    async def translate_batch(self, texts: list[str], model: str) -> list[str]:
+        """
+        Sends every text in one request; the inference API accepts a list
+        in `inputs` and answers with one translation per input, in order.
+        """
+        breaker = self.breaker(model)
+        if not breaker.allow():
+            PROVIDER_ERRORS.inc(provider=self.name, model=model, reason="breaker_open")
+            raise ProviderError(f"HF model {model} is cooling down")
+        start = time.perf_counter()
+        try:
+            async with self.semaphore:
+                async with self._get_session().post(f"{self.api_url}/{model}", json={"inputs": texts}) as response:
+                    if response.status != 200:
+                        raise ProviderError(f"HF Translation failed ({response.status})")
+                    result = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            breaker.record_failure()
+            PROVIDER_ERRORS.inc(provider=self.name, model=model, reason="request")
+            raise ProviderError(f"HF request failed: {e!r}") from e
+        except ProviderError:
+            breaker.record_failure()
+            PROVIDER_ERRORS.inc(provider=self.name, model=model, reason="status")
+            raise
+        except ValueError as e:
+            # A 200 with a non-JSON body (HTML error pages from a proxy, say)
+            breaker.record_failure()
+            PROVIDER_ERRORS.inc(provider=self.name, model=model, reason="response")
+            raise ProviderError(f"HF Translation failed (invalid JSON: {e})") from e
+        finally:
+            PROVIDER_SECONDS.observe(time.perf_counter() - start, provider=self.name, model=model)
+        if (isinstance(result, list) and len(result) == len(texts)
+                and all(isinstance(item, dict) and "translation_text" in item for item in result)):
+            breaker.record_success()
+            return [item["translation_text"] for item in result]
+        breaker.record_failure()
+        PROVIDER_ERRORS.inc(provider=self.name, model=model, reason="response")
+        raise ProviderError("HF Translation failed (unexpected response)")
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+# ---------- Google Translate ----------
+class GoogleProvider:
+    """
+    googletrans is synchronous, so calls run on a small dedicated thread pool.
+    Each worker thread keeps its own Translator (and its keep-alive client).
+    """
+    name = "google"
+
+    def __init__(self, timeout: float = GOOGLE_TIMEOUT, concurrency: int = GOOGLE_CONCURRENCY):
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="googletrans")
+        self.breaker = CircuitBreaker()
+        self._local = threading.local()
+
+    def _translate_sync(self, text: str, src: str, tgt: str) -> str:
+        translator = getattr(self._local, "translator", None)
+        if translator is None:
+            from googletrans import Translator
+            translator = self._local.translator = Translator()
+        return translator.translate(text, src=src, dest=tgt).text
+
+    async def translate(self, text: str, src: str, tgt: str) -> str:
+        if not self.breaker.allow():
+            PROVIDER_ERRORS.inc(provider=self.name, model="googletrans", reason="breaker_open")
+            raise ProviderError("Google Translate is cooling down")
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(
+                loop.run_in_executor(self.executor, self._translate_sync, text, src, tgt),
+                timeout=self.timeout
+            )
+        except Exception as e:
+            self.breaker.record_failure()
+            PROVIDER_ERRORS.inc(provider=self.name, model="googletrans", reason="request")
+            raise ProviderError(f"Google Translate failed: {e}") from e
+        finally:
+            PROVIDER_SECONDS.observe(time.perf_counter() - start, provider=self.name, model="googletrans")
+        self.breaker.record_success()
+        return result
+
+    async def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------- Client ----------
+class TranslationClient:
+    """
+    Routes a (src, tgt) pair to its HF model when one is configured and
+    falls back to Google Translate when HF fails or its breaker is open.
+    HF requests are micro-batched per model. Raises ProviderError when
+    every provider failed.
+    """
+
+    def __init__(self, hf: HuggingFaceProvider = None, google: GoogleProvider = None,
+                 batcher: BatchScheduler = None):
+        self.hf = hf or HuggingFaceProvider()
+        self.google = google or GoogleProvider()
+        self.batcher = batcher or BatchScheduler(self._send_hf_batch)
+
+    async def _send_hf_batch(self, model: str, texts: list[str]) -> list[str]:
+        return await self.hf.translate_batch(texts, model)
+
+    async def translate(self, text: str, src: str, tgt: str) -> str:
+        return (await self.translate_with_provider(text, src, tgt))[0]
+
+    async def translate_with_provider(self, text: str, src: str, tgt: str) -> tuple[str, str]:
+        """
+        Returns (translation, provider): the HF model name, or "google" when
+        Google Translate answered.
+        """
+        model_name = HF_MODELS.get((src, tgt))
+        hf_error = None
+        if model_name:
+            try:
+                return await self.batcher.submit(model_name, text), model_name
+            except ProviderError as e:
+                hf_error = e
+        try:
+            return await self.google.translate(text, src, tgt), "google"
+        except ProviderError as e:
+            if hf_error:
+                raise ProviderError(f"{hf_error}; {e}") from e
+            raise
+
+    async def close(self):
+        await self.batcher.close()
+        await self.hf.close()
+        await self.google.close()
@@ -0,0 +1,267 @@
+# ---------- FILE: translation_scheduler.py ----------
+import asyncio
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+
+from config import (
+    TRANSLATE_GLOBAL_RATE, TRANSLATE_GLOBAL_BURST, TRANSLATE_GUILD_RATE, TRANSLATE_GUILD_BURST,
+    TRANSLATE_CHANNEL_RATE, TRANSLATE_CHANNEL_BURST, TRANSLATE_QUEUE_MAX, TRANSLATE_OVERFLOW,
+    TRANSLATE_MAX_WAIT, TRANSLATE_MAX_INFLIGHT
+)
+
+OVERFLOW_POLICIES = ("drop", "merge")
+MERGE_MAX_CHARS = 1800  # a merged job's reply still has to fit in one Discord message
+
+
+# ---------- Token Bucket ----------
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_in(self, now: float) -> float:
+        """
+        Seconds until one token is available (0 when it already is).
+        """
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+
+@dataclass
+class Job:
+    guild_id: int
+    channel_id: int
+    text: str
+    src: str
+    tgt: str
+    future: asyncio.Future
+    enqueued: float = field(default_factory=time.monotonic)
+    shared: bool = False  # other callers deduped onto this job, so it cannot absorb merges
+    mergeable: bool = True  # False for edits: their reply must translate only their own text
+
+    @property
+    def key(self) -> tuple:
+        return (self.text, self.src, self.tgt)
+
+
+# ---------- Scheduler ----------
+class FairScheduler:
+    """
+    Queues translations per guild and dispatches them round-robin across
+    guilds, so one busy server cannot starve the rest of the shared provider
+    quota. A job leaves its queue only when the global, guild and channel
+    token buckets all have a token and an in-flight slot is free.
+
+    `submit()` returns the translation, or None when the message was dropped
+    (channel queue full, or waited longer than `max_wait`) or merged into the
+    previous queued message of its channel, whose reply then covers both.
+    Identical texts already queued or in flight share one translation.
+    """
+
+    def __init__(self, translate, overflow: str = TRANSLATE_OVERFLOW, queue_max: int = TRANSLATE_QUEUE_MAX,
+                 max_wait: float = TRANSLATE_MAX_WAIT, max_inflight: int = TRANSLATE_MAX_INFLIGHT):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, not {overflow!r}")
+        self.translate = translate  # async (text, src, tgt) -> str
+        self.overflow = overflow
+        self.queue_max = queue_max
+        self.max_wait = max_wait
+        self.global_bucket = TokenBucket(TRANSLATE_GLOBAL_RATE, TRANSLATE_GLOBAL_BURST)
+        self._guild_buckets = {}
+        self._channel_buckets = {}
+        self._queues = {}  # guild id -> deque of Job
+        self._rotation = deque()  # guild ids with queued jobs, next to serve first
+        self._channel_depth = Counter()
+        self._by_key = {}  # (text, src, tgt) -> queued or in-flight Job
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._wakeup = asyncio.Event()
+        self._dispatcher = None
+        self._tasks = set()
+        # ---------- Stats ----------
+        self.events = Counter()  # submitted, dispatched, deduped, merged, dropped, expired
+        self._recent_waits = deque(maxlen=1000)
+
+    # ---------- Buckets ----------
+    def _guild_bucket(self, guild_id) -> TokenBucket:
+        if guild_id not in self._guild_buckets:
+            self._guild_buckets[guild_id] = TokenBucket(TRANSLATE_GUILD_RATE, TRANSLATE_GUILD_BURST)
+        return self._guild_buckets[guild_id]
+
+    def _channel_bucket(self, channel_id) -> TokenBucket:
+        if channel_id not in self._channel_buckets:
+            self._channel_buckets[channel_id] = TokenBucket(TRANSLATE_CHANNEL_RATE, TRANSLATE_CHANNEL_BURST)
+        return self._channel_buckets[channel_id]
+
+    # ---------- Admission ----------
+    async def submit(self, guild_id, channel_id, text: str, src: str, tgt: str, mergeable: bool = True) -> str | None:
+        # mergeable=False: the caller needs this text's own translation (an
+        # edit updating its reply), so a full queue drops it and nothing is
+        # merged into it
+        self.events["submitted"] += 1
+        existing = self._by_key.get((text, src, tgt))
+        if existing is not None:
+            self.events["deduped"] += 1
+            existing.shared = True
+            return await asyncio.shield(existing.future)
+
+        if self._channel_depth[channel_id] >= self.queue_max:
+            target = self._merge_target(guild_id, channel_id, src, tgt) if self.overflow == "merge" and mergeable else None
+            if target is None or len(target.text) + len(text) + 1 > MERGE_MAX_CHARS:
+                self.events["dropped"] += 1
+                return None
+            if self._by_key.get(target.key) is target:
+                del self._by_key[target.key]
+            target.text = f"{target.text}\n{text}"
+            self._by_key.setdefault(target.key, target)
+            self.events["merged"] += 1
+            return None
+
+        job = Job(guild_id, channel_id, text, src, tgt, asyncio.get_running_loop().create_future(), mergeable=mergeable)
+        self._by_key[job.key] = job
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            queue = self._queues[guild_id] = deque()
+            self._rotation.append(guild_id)
+        queue.append(job)
+        self._channel_depth[channel_id] += 1
+        self._ensure_dispatcher()
+        self._wakeup.set()
+        return await asyncio.shield(job.future)
+
+    def _merge_target(self, guild_id, channel_id, src, tgt) -> Job | None:
+        for job in reversed(self._queues.get(guild_id, ())):
+            if job.channel_id == channel_id:
+                return job if (job.src, job.tgt) == (src, tgt) and job.mergeable and not job.shared else None
+        return None
+
+    # ---------- Dispatch ----------
+    def _ensure_dispatcher(self):
+        # Started lazily so it binds to the bot's running event loop
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    def _finish(self, job: Job, result=None, error: Exception = None):
+        if self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+        if job.future.done():
+            return
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+    def _dequeue(self, guild_id, index: int) -> Job:
+        queue = self._queues[guild_id]
+        job = queue[index]
+        del queue[index]
+        if not queue:
+            # Leaves the rotation at once, so stats never count an idle guild
+            del self._queues[guild_id]
+            self._rotation.remove(guild_id)
+        self._channel_depth[job.channel_id] -= 1
+        if not self._channel_depth[job.channel_id]:
+            del self._channel_depth[job.channel_id]
+        return job
+
+    def _next_job(self) -> tuple[Job | None, float | None]:
+        """
+        The next dispatchable job in round-robin guild order, or None and
+        how long until a token could free one up (None: nothing queued).
+        """
+        now = time.monotonic()
+        wait = self.global_bucket.ready_in(now)
+        if wait:
+            return None, wait
+        soonest = None
+        for _ in range(len(self._rotation)):
+            if not self._rotation:
+                break
+            guild_id = self._rotation[0]
+            queue = self._queues[guild_id]
+            while queue and now - queue[0].enqueued > self.max_wait:
+                self.events["expired"] += 1
+                self._finish(self._dequeue(guild_id, 0))
+            if not queue:
+                continue  # every job expired; _dequeue took the guild out
+            self._rotation.rotate(-1)
+            guild_wait = self._guild_bucket(guild_id).ready_in(now)
+            if guild_wait:
+                soonest = guild_wait if soonest is None else min(soonest, guild_wait)
+                continue
+            for i, job in enumerate(queue):
+                channel_wait = self._channel_bucket(job.channel_id).ready_in(now)
+                if channel_wait:
+                    soonest = channel_wait if soonest is None else min(soonest, channel_wait)
+                    continue
+                self.global_bucket.take(now)
+                self._guild_bucket(guild_id).take(now)
+                self._channel_bucket(job.channel_id).take(now)
+                return self._dequeue(guild_id, i), None
+        return None, soonest
+
+    async def _dispatch(self):
+        while True:
+            await self._slots.acquire()
+            job, wait = self._next_job()
+            while job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                job, wait = self._next_job()
+            self.events["dispatched"] += 1
+            self._recent_waits.append(time.monotonic() - job.enqueued)
+            task = asyncio.ensure_future(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: Job):
+        try:
+            result = await self.translate(job.text, job.src, job.tgt)
+        except Exception as e:
+            self._finish(job, error=e)
+        else:
+            self._finish(job, result)
+        finally:
+            self._slots.release()
+
+    # ---------- Stats ----------
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self) -> dict:
+        waits = sorted(self._recent_waits)
+        return {
+            **{event: self.events[event] for event in ("submitted", "dispatched", "deduped", "merged", "dropped", "expired")},
+            "queue_depth": self.queue_depth(),
+            "queued_guilds": len(self._queues),
+            "in_flight": len(self._tasks),
+            "queue_wait_p50": waits[len(waits) // 2] if waits else 0.0,
+            "queue_wait_max": waits[-1] if waits else 0.0,
+        }
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+        for queue in self._queues.values():
+            for job in queue:
+                self._finish(job)
+        self._queues.clear()
+        self._rotation.clear()
+        self._channel_depth.clear()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,179 @@
+# ---------- FILE: web.py ----------
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+from aiohttp import web
+
+import channel_cache
+import leaderboard_index
+import metrics
+from repository import repo
+from score_history import PERIODS, DEFAULT_BUCKETS, window_key
+from config import WEB_HOST, WEB_PORT, WEB_CACHE_SIZE, WEB_MAX_AGE
+
+# Runs on the bot's own event loop: handlers read the in-memory caches
+# directly and only history goes to the database (on the repo's DB thread).
+
+HTTP_SECONDS = metrics.registry.histogram("http_request_seconds", "Web request latency")
+MAX_PAGE = 100
+
+
+# ---------- Response Cache ----------
+class ResponseCache:
+    """
+    Serialized JSON bodies keyed by (endpoint, params, data version). A new
+    version means a new key, so nothing needs invalidating; old entries just
+    age out of the LRU.
+    """
+
+    def __init__(self, size: int = WEB_CACHE_SIZE):
+        self.size = size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key, build) -> tuple[str, bytes]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        body = json.dumps(await build(), separators=(",", ":")).encode("utf-8")
+        entry = (f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"', body)
+        self._entries[key] = entry
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+        return entry
+
+
+cache = ResponseCache()
+metrics.registry.collect(
+    "web_cache_hit_ratio", "API response cache hits / lookups",
+    lambda: cache.hits / (cache.hits + cache.misses) if cache.hits + cache.misses else 0.0
+)
+
+
+async def cached_json(request, key, build) -> web.Response:
+    etag, body = await cache.get(key, build)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={WEB_MAX_AGE}"}
+    if etag in request.headers.get("If-None-Match", ""):
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, content_type="application/json", headers=headers)
+
+
+def bad_request(message: str, status: int = 400) -> web.Response:
+    return web.json_response({"error": message}, status=status)
+
+
+def _int_param(request, name: str, default: int, low: int, high: int) -> int:
+    try:
+        value = int(request.query.get(name, default))
+    except ValueError:
+        raise web.HTTPBadRequest(text=json.dumps({"error": f"{name} must be an integer"}), content_type="application/json")
+    return min(max(value, low), high)
+
+
+# ---------- Routes ----------
+async def health(request):
+    return web.Response(text="Bot is alive!")
+
+
+async def prometheus_metrics(request):
+    return web.Response(text=metrics.registry.render_prometheus(), content_type="text/plain",
+                        headers={"X-Content-Type-Options": "nosniff"})
+
+
+async def stats(request):
+    return web.json_response(metrics.registry.snapshot())
+
+
+async def leaderboard(request):
+    category = request.match_info["category"]
+    if category not in leaderboard_index.CATEGORIES:
+        return bad_request(f"category must be one of {', '.join(leaderboard_index.CATEGORIES)}", 404)
+    offset = _int_param(request, "offset", 0, 0, 10 ** 9)
+    limit = _int_param(request, "limit", 25, 1, MAX_PAGE)
+
+    async def build():
+        index = leaderboard_index.get(category)
+        return {
+            "category": category,
+            "total": len(index),
+            "offset": offset,
+            "entries": [{"rank": rank, "name": name, "score": score} for rank, name, score in index.top(limit, offset)],
+        }
+
+    return await cached_json(request, ("leaderboard", category, offset, limit, repo.score_version), build)
+
+
+async def history(request):
+    name = request.match_info["name"]
+    category = request.query.get("category", "kill")
+    period = request.query.get("period", "30d")
+    bucket = request.query.get("bucket") or DEFAULT_BUCKETS.get(period)
+    if category not in leaderboard_index.CATEGORIES:
+        return bad_request(f"category must be one of {', '.join(leaderboard_index.CATEGORIES)}")
+    if period not in PERIODS:
+        return bad_request(f"period must be one of {', '.join(PERIODS)}")
+    if bucket not in ("hour", "day", "week"):
+        return bad_request("bucket must be one of hour, day, week")
+    if leaderboard_index.get(category).rank_of(name) is None:
+        return bad_request("name not found", 404)
+
+    async def build():
+        series = await repo.history_series([name], category, period, bucket)
+        return {
+            "name": name,
+            "category": category,
+            "period": period,
+            "bucket": bucket,
+            "points": [{"t": when.isoformat(), "value": value} for when, value in series[name]],
+        }
+
+    return await cached_json(request, ("history", name, category, period, bucket, window_key(period, bucket), repo.score_version), build)
+
+
+async def channels(request):
+    async def build():
+        # Ids as strings: they overflow JavaScript numbers
+        return [
+            {"channel_id": str(ch.channel_id), "lang1": ch.lang1, "lang2": ch.lang2, "flags": list(ch.flags)}
+            for ch in channel_cache.all_configs()
+        ]
+
+    return await cached_json(request, ("channels", channel_cache.version), build)
+
+
+# ---------- App ----------
+@web.middleware
+async def timing(request, handler):
+    start = time.perf_counter()
+    try:
+        return await handler(request)
+    finally:
+        route = request.match_info.route.resource
+        HTTP_SECONDS.observe(time.perf_counter() - start, route=route.canonical if route else "unmatched")
+
+
+def create_app() -> web.Application:
+    app = web.Application(middlewares=[timing])
+    app.router.add_get("/", health)
+    app.router.add_get("/metrics", prometheus_metrics)
+    app.router.add_get("/stats", stats)
+    app.router.add_get("/api/leaderboard/{category}", leaderboard)
+    app.router.add_get("/api/history/{name}", history)
+    app.router.add_get("/api/channels", channels)
+    return app
+
+
+async def start(host: str = WEB_HOST, port: int = WEB_PORT) -> web.AppRunner:
+    """
+    Starts serving on the running loop; call `cleanup()` on the result to stop.
+    """
+    runner = web.AppRunner(create_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner